@@ -1,10 +1,13 @@
-import os 
 import json 
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from tavily import TavilyClient 
 from .utils import parse_json_response
+from .search import get_search_enricher
+from .profiler import profiler
+from .profiles import SchedulingPreferences
+from .schedule_validator import repair_schedule, reschedule_locally, check_multi_day_consistency
 from crewai import Agent, Task, Crew, Process
 
 # load Configuration
@@ -12,15 +15,65 @@ load_dotenv()
 
 # keys
 # OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-TAVILY_API = os.getenv("TAVILY_API_KEY")
+
+# Fixed instructions first, all per-request data last (see prompt_layout.py)
+SCHEDULE_INSTRUCTIONS = """Create a personalized daily schedule based on the user information at the end of this task.
+
+Consider the user's mood, energy level, and provide a schedule that balances productivity,
+wellbeing, and necessary breaks. Include specific recommendations for meals, activities,
+and mindfulness practices based on their current mood.
+
+Important: Your schedule should cover the FULL day including both daytime and evening activities.
+Make sure to include evening activities like dinner, exercise, relaxation, and personal time.
+Existing calendar events that are not flexible must keep their exact times.
+
+Return a JSON string in the format
+{
+    "schedule": [
+        {
+            "time": "HH:MM",
+            "duration_minutes": 30,
+            "activity": "Activity description",
+            "activity_type": "work/break/meal/exercise/mindfulness/other",
+            "notes": "Optional notes or recommendations"
+        },
+        ...
+    ],
+    "day_summary": "Overall assessment of the day structure",
+    "mood_based_recommendations": {
+        "energy_management": "...",
+        "break_activities": ["...", "..."],
+        "recommended_meals": ["...", "..."],
+        "mindfulness_practices": ["...", "..."]
+    },
+    "adaptability_notes": "Suggestions for adjusting if energy/mood changes"
+}
+"""
+
+ADJUST_INSTRUCTIONS = """Adjust the user's existing daily schedule based on the changes at the end of this task.
+
+Modify the remaining schedule to account for the user's changed mood/energy
+and any new events, while ensuring they still accomplish their important goals.
+Remember to maintain a good balance between work activities and personal time,
+especially for evening activities. Do not reschedule completed activities.
+
+Return a JSON string with the updated schedule in the same format as the current schedule,
+plus a change_summary field explaining the adjustments made and why.
+"""
+
+SCHEDULE_EXPECTED_OUTPUT = "A JSON string in the format specified in the task instructions."
+
 
 class Life_Scheduler:
     def __init__(self):
-        self.tavily_client = TavilyClient(api_key=TAVILY_API)
+        self.search_enricher = get_search_enricher()
         self.setup_agents()
         
     def setup_agents(self):
-        self.Life_Scheduler_Agent = Agent(
+        self.Life_Scheduler_Agent = self.build_agent()
+        
+    def build_agent(self) -> Agent:
+        return Agent(
             role="Life Scheduler Agent",
             goal="Create balanced daily schedules that promote productivity, mental wellbeing, and physical health",
             backstory="""You are a Life Scheduler Agent. Your goal is to create personalized daily schedules 
@@ -159,11 +212,105 @@ class Life_Scheduler:
             
         return processed
     
+    def normalize_preferences(self, preferences: Optional[Dict] = None) -> Dict:
+        """
+        Normalize time formats in user preferences without modifying the input
+        
+        Args:
+            preferences: Dictionary of user preferences, preferences compiled
+                from a stored profile, or None for the defaults
+            
+        Returns:
+            New dictionary of preferences with times in 24-hour format
+        """
+        if isinstance(preferences, SchedulingPreferences):
+            # Already normalized when the profile was stored
+            return preferences.as_dict()
+        if preferences is None:
+            return {
+                "work_start_time": "09:00",
+                "work_end_time": "17:00",
+                "preferred_break_duration": 15,  # minutes
+                "preferred_meal_times": {
+                    "breakfast": "08:00",
+                    "lunch": "12:30",
+                    "dinner": "18:30"
+                },
+                "exercise_duration": 30,  # minutes
+                "mindfulness_duration": 10  # minutes
+            }
+            
+        normalized = preferences.copy()
+        if "work_start_time" in normalized:
+            normalized["work_start_time"] = self.normalize_time_format(normalized["work_start_time"])
+        if "work_end_time" in normalized:
+            normalized["work_end_time"] = self.normalize_time_format(normalized["work_end_time"])
+        if "preferred_meal_times" in normalized:
+            normalized["preferred_meal_times"] = {
+                meal: self.normalize_time_format(time)
+                for meal, time in normalized["preferred_meal_times"].items()
+            }
+        return normalized
+        
+    def validate_and_repair(self,
+                            result: Dict,
+                            fixed_events: Optional[List[Dict]] = None,
+                            preferences: Optional[Dict] = None) -> Dict:
+        """
+        Check the generated schedule against fixed events and preferences and
+        repair common faults locally instead of asking the model again.
+        
+        Args:
+            result: Parsed agent response containing a "schedule" list
+            fixed_events: Normalized calendar events the schedule must respect
+            preferences: Normalized user preferences
+            
+        Returns:
+            The result with a repaired "schedule" and a "validation" report
+        """
+        schedule = result.get("schedule") if isinstance(result, dict) else None
+        if not isinstance(schedule, list):
+            return result
+            
+        entries = []
+        for entry in schedule:
+            if not isinstance(entry, dict):
+                continue
+            entry = entry.copy()
+            if isinstance(entry.get("time"), str):
+                entry["time"] = self.normalize_time_format(entry["time"])
+            entries.append(entry)
+            
+        result["schedule"], result["validation"] = repair_schedule(entries, fixed_events, preferences)
+        return result
+    
+    def research_notes(self, mood_data: Dict, daily_goals: Optional[List[str]] = None) -> str:
+        """
+        Look up scheduling guidance for the user's mood and goals via cached web search.
+        
+        Args:
+            mood_data: Dictionary containing mood analysis results
+            daily_goals: List of goals the user wants to accomplish
+            
+        Returns:
+            Compact block of search snippets, empty if nothing was found
+        """
+        if not isinstance(mood_data, dict):
+            mood_data = {}
+        tags = mood_data.get("Mood tags") or []
+        energy = mood_data.get("Energy", "")
+        queries = [f"daily routine tips when feeling {tag}" for tag in list(tags)[:2]]
+        if energy:
+            queries.append(f"how to schedule the day with {energy} energy")
+        queries.extend(f"how to fit {goal} into a daily schedule" for goal in (daily_goals or [])[:2])
+        return self.search_enricher.enrichment_text(queries)
+        
     def create_schedule(self, 
                        mood_data: Dict, 
                        daily_goals: Optional[List[str]] = None,
                        calendar_events: Optional[List[Dict]] = None,
-                       preferences: Optional[Dict] = None) -> Dict:
+                       preferences: Optional[Dict] = None,
+                       enrich: bool = False) -> Dict:
         """
         Create a personalized daily schedule based on mood analysis and user preferences.
         
@@ -171,7 +318,8 @@ class Life_Scheduler:
             mood_data: Dictionary containing mood analysis results
             daily_goals: List of goals the user wants to accomplish today
             calendar_events: List of existing calendar events to incorporate
-            preferences: Dictionary of user preferences for scheduling
+            preferences: Dictionary of user preferences for scheduling, or a stored profile's preferences
+            enrich: Ground the schedule with cached web search results
             
         Returns:
             Dictionary containing the schedule and recommendations
@@ -187,102 +335,264 @@ class Life_Scheduler:
             # Normalize time formats in events
             calendar_events = self.preprocess_events(calendar_events)
             
-        if preferences is None:
-            preferences = {
-                "work_start_time": "09:00",
-                "work_end_time": "17:00",
-                "preferred_break_duration": 15,  # minutes
-                "preferred_meal_times": {
-                    "breakfast": "08:00",
-                    "lunch": "12:30",
-                    "dinner": "18:30"
-                },
-                "exercise_duration": 30,  # minutes
-                "mindfulness_duration": 10  # minutes
-            }
-        else:
-            # Normalize time formats in preferences
-            if "work_start_time" in preferences:
-                preferences["work_start_time"] = self.normalize_time_format(preferences["work_start_time"])
-            if "work_end_time" in preferences:
-                preferences["work_end_time"] = self.normalize_time_format(preferences["work_end_time"])
-            if "preferred_meal_times" in preferences:
-                for meal, time in preferences["preferred_meal_times"].items():
-                    preferences["preferred_meal_times"][meal] = self.normalize_time_format(time)
-            
-        # Create task description with all available information
-        task_description = f"""
-        Create a personalized daily schedule based on the following information:
-        
-        MOOD ANALYSIS:
-        {json.dumps(mood_data, indent=2)}
+        preferences = self.normalize_preferences(preferences)
+        with profiler.stage("schedule.research"):
+            research = self.research_notes(mood_data, daily_goals) if enrich else ""
         
-        DAILY GOALS:
-        {json.dumps(daily_goals, indent=2)}
+        return self.generate_schedule(mood_data, daily_goals, calendar_events, preferences, research=research)
         
-        EXISTING CALENDAR EVENTS:
-        {json.dumps(calendar_events, indent=2)}
-        
-        USER PREFERENCES:
-        {json.dumps(preferences, indent=2)}
+    @staticmethod
+    def build_schedule_description(mood_data: Dict,
+                                   daily_goals: List[str],
+                                   calendar_events: List[Dict],
+                                   preferences: Dict,
+                                   day_label: Optional[str] = None,
+                                   research: str = "") -> str:
+        """
+        Task description for schedule creation: fixed instructions first, user data last.
+
+        The day label and that day's events come after everything shared by the
+        days of a multi-day plan, so those days also share a cached prefix.
+        """
+        sections = [
+            SCHEDULE_INSTRUCTIONS,
+            "USER INFORMATION:",
+            f"USER PREFERENCES:\n{json.dumps(preferences, indent=2)}",
+            f"MOOD ANALYSIS:\n{json.dumps(mood_data, indent=2)}",
+            f"DAILY GOALS:\n{json.dumps(daily_goals, indent=2)}",
+        ]
+        if research:
+            sections.append(f"BACKGROUND RESEARCH (use where relevant):\n{research}")
+        if day_label:
+            sections.append(f"DAY: {day_label}")
+        sections.append(f"EXISTING CALENDAR EVENTS:\n{json.dumps(calendar_events, indent=2)}")
+        return "\n\n".join(sections)
         
-        Consider the user's mood, energy level, and provide a schedule that balances productivity,
-        wellbeing, and necessary breaks. Include specific recommendations for meals, activities,
-        and mindfulness practices based on their current mood.
+    def generate_schedule(self,
+                          mood_data: Dict,
+                          daily_goals: List[str],
+                          calendar_events: List[Dict],
+                          preferences: Dict,
+                          agent: Optional[Agent] = None,
+                          day_label: Optional[str] = None,
+                          research: str = "") -> Dict:
+        """
+        Run the scheduler agent on already normalized inputs.
         
-        Important: Your schedule should cover the FULL day including both daytime and evening activities.
-        Make sure to include evening activities like dinner, exercise, relaxation, and personal time.
+        Args:
+            mood_data: Dictionary containing mood analysis results
+            daily_goals: List of goals the user wants to accomplish that day
+            calendar_events: Normalized calendar events to incorporate
+            preferences: Normalized user preferences
+            agent: Agent to run the task with, defaults to the shared scheduler agent
+            day_label: Optional date/weekday the schedule is for
+            research: Optional search snippets to ground the recommendations
+            
+        Returns:
+            Dictionary containing the validated schedule and recommendations
         """
+        agent = agent or self.Life_Scheduler_Agent
         
         task = Task(
-            description=task_description,
-            agent=self.Life_Scheduler_Agent,
-            expected_output="""A JSON string in the format
-            {
-                "schedule": [
-                    {
-                        "time": "HH:MM",
-                        "duration_minutes": 30,
-                        "activity": "Activity description",
-                        "activity_type": "work/break/meal/exercise/mindfulness/other",
-                        "notes": "Optional notes or recommendations"
-                    },
-                    ...
-                ],
-                "day_summary": "Overall assessment of the day structure",
-                "mood_based_recommendations": {
-                    "energy_management": "...",
-                    "break_activities": ["...", "..."],
-                    "recommended_meals": ["...", "..."],
-                    "mindfulness_practices": ["...", "..."]
-                },
-                "adaptability_notes": "Suggestions for adjusting if energy/mood changes"
-            }
-            """
+            description=self.build_schedule_description(
+                mood_data, daily_goals, calendar_events, preferences, day_label, research
+            ),
+            agent=agent,
+            expected_output=SCHEDULE_EXPECTED_OUTPUT
         )
         
         crew = Crew(
-            agents=[self.Life_Scheduler_Agent],
+            agents=[agent],
             tasks=[task],
             process=Process.sequential
         )
         
-        results = crew.kickoff()
-        return parse_json_response(str(results))
+        with profiler.stage("schedule.crew_kickoff"):
+            results = crew.kickoff()
+        with profiler.stage("schedule.parse_json"):
+            result = parse_json_response(str(results))
+        with profiler.stage("schedule.validate"):
+            return self.validate_and_repair(result, calendar_events, preferences)
+        
+    def create_multi_day_schedule(self,
+                                  mood_data: Dict,
+                                  num_days: int = 7,
+                                  start_date: Optional[str] = None,
+                                  daily_goals: Optional[List[str]] = None,
+                                  recurring_events: Optional[List[Dict]] = None,
+                                  day_events: Optional[Dict[str, List[Dict]]] = None,
+                                  preferences: Optional[Dict] = None,
+                                  max_workers: int = 4,
+                                  enrich: bool = False) -> Dict:
+        """
+        Create schedules for several consecutive days, generating the days concurrently.
+        
+        Preferences and recurring events are normalized once and shared by every
+        day. Each day runs on its own agent instance in a bounded thread pool, and
+        the results are stitched together with cross-day consistency checks.
+        
+        Args:
+            mood_data: Dictionary containing mood analysis results
+            num_days: Number of days to schedule
+            start_date: First day in YYYY-MM-DD format, defaults to today
+            daily_goals: Goals to work towards on each day
+            recurring_events: Events repeated on every day, or only on the weekdays
+                listed in an optional "days" field (e.g. ["monday", "wednesday"])
+            day_events: One-off events keyed by date (YYYY-MM-DD)
+            preferences: Dictionary of user preferences for scheduling, or a stored profile's preferences
+            max_workers: Maximum number of days generated at the same time
+            enrich: Ground the schedules with cached web search results
+            
+        Returns:
+            Dictionary with the per-day schedules and a list of consistency issues
+        """
+        if daily_goals is None:
+            daily_goals = []
+        if day_events is None:
+            day_events = {}
+            
+        first_day = datetime.strptime(start_date, "%Y-%m-%d") if start_date else datetime.now()
+        dates = [first_day + timedelta(days=offset) for offset in range(max(1, num_days))]
+        
+        # Shared inputs are normalized once for all days
+        preferences = self.normalize_preferences(preferences)
+        recurring_events = self.preprocess_events(recurring_events or [])
+        research = self.research_notes(mood_data, daily_goals) if enrich else ""
+        
+        def events_for(date: datetime) -> List[Dict]:
+            weekday = date.strftime("%A").lower()
+            events = []
+            for event in recurring_events:
+                days = [str(day).lower() for day in event.get("days") or []]
+                if days and weekday not in days:
+                    continue
+                events.append({key: value for key, value in event.items() if key != "days"})
+            events.extend(self.preprocess_events(day_events.get(date.strftime("%Y-%m-%d"), [])))
+            return events
+            
+        def generate_day(date: datetime) -> Dict:
+            calendar_events = events_for(date)
+            day = {
+                "date": date.strftime("%Y-%m-%d"),
+                "weekday": date.strftime("%A"),
+                "calendar_events": calendar_events,
+            }
+            try:
+                # A fresh agent per day so concurrent crews do not share agent state
+                result = self.generate_schedule(
+                    mood_data, daily_goals, calendar_events, preferences,
+                    agent=self.build_agent(),
+                    day_label=f"{day['weekday']} {day['date']}",
+                    research=research
+                )
+            except Exception as e:
+                result = {"error": f"Failed to generate schedule: {str(e)}"}
+            day.update(result)
+            return day
+            
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(dates)))) as pool:
+            days = list(pool.map(profiler.bind(generate_day), dates))
+            
+        return {
+            "days": days,
+            "consistency_issues": check_multi_day_consistency(days, daily_goals),
+        }
+        
+    @staticmethod
+    def build_adjust_description(current_schedule: Dict,
+                                 new_mood_data: Dict,
+                                 completed_activities: List[str],
+                                 new_events: List[Dict]) -> str:
+        """Task description for schedule adjustment: fixed instructions first, user data last."""
+        return "\n\n".join([
+            ADJUST_INSTRUCTIONS,
+            "USER INFORMATION:",
+            f"CURRENT SCHEDULE:\n{json.dumps(current_schedule, indent=2)}",
+            f"UPDATED MOOD ANALYSIS:\n{json.dumps(new_mood_data, indent=2)}",
+            f"COMPLETED ACTIVITIES:\n{json.dumps(completed_activities, indent=2)}",
+            f"NEW EVENTS TO INCORPORATE:\n{json.dumps(new_events, indent=2)}",
+        ])
+        
+    @staticmethod
+    def mood_unchanged(previous_mood_data: Optional[Dict], new_mood_data: Optional[Dict]) -> bool:
+        """Check whether two mood analyses agree on mood tags and energy level."""
+        if not isinstance(previous_mood_data, dict) or not isinstance(new_mood_data, dict):
+            return False
+            
+        def signature(mood_data: Dict):
+            tags = mood_data.get("Mood tags") or []
+            if isinstance(tags, str):
+                tags = [tags]
+            energy = str(mood_data.get("Energy", "")).strip().lower()
+            return frozenset(str(tag).strip().lower() for tag in tags), energy
+            
+        return signature(previous_mood_data) == signature(new_mood_data)
+    
+    def adjust_locally(self,
+                       current_schedule: Dict,
+                       completed_activities: List[str],
+                       new_events: List[Dict],
+                       calendar_events: Optional[List[Dict]] = None,
+                       current_time: Optional[str] = None) -> Optional[Dict]:
+        """
+        Fit new events into the current schedule without calling the model.
+        
+        Args:
+            current_schedule: The existing schedule dictionary
+            completed_activities: List of activities already completed
+            new_events: Normalized calendar events to incorporate
+            calendar_events: Normalized calendar events the schedule was built from
+            current_time: Current time of day, "HH:MM"
+            
+        Returns:
+            Updated schedule dictionary, or None if the events cannot be fitted locally
+        """
+        schedule = current_schedule.get("schedule") if isinstance(current_schedule, dict) else None
+        if not isinstance(schedule, list) or not all(isinstance(entry, dict) for entry in schedule):
+            return None
+            
+        entries = []
+        for entry in schedule:
+            entry = entry.copy()
+            if isinstance(entry.get("time"), str):
+                entry["time"] = self.normalize_time_format(entry["time"])
+            entries.append(entry)
+            
+        rescheduled, changes = reschedule_locally(entries, new_events, completed_activities,
+                                                  fixed_events=calendar_events, current_time=current_time)
+        if rescheduled is None:
+            return None
+            
+        result = {key: value for key, value in current_schedule.items() if key != "validation"}
+        result["schedule"] = rescheduled
+        result["change_summary"] = "Mood is unchanged, so the remaining schedule was shifted around the new events: " + "; ".join(changes)
+        result["adjustment_mode"] = "local"
+        return result
         
     def adjust_schedule(self, 
                       current_schedule: Dict, 
                       new_mood_data: Dict,
                       completed_activities: Optional[List[str]] = None,
-                      new_events: Optional[List[Dict]] = None) -> Dict:
+                      new_events: Optional[List[Dict]] = None,
+                      previous_mood_data: Optional[Dict] = None,
+                      calendar_events: Optional[List[Dict]] = None,
+                      current_time: Optional[str] = None) -> Dict:
         """
         Adjust an existing schedule based on changed mood or new events.
         
+        When only events changed (the new mood matches previous_mood_data) the
+        schedule is adjusted locally, falling back to the model if the remaining
+        activities cannot be fitted around the new events.
+        
         Args:
             current_schedule: The existing schedule dictionary
             new_mood_data: Updated mood analysis results
             completed_activities: List of activities already completed
             new_events: Any new calendar events that need to be incorporated
+            previous_mood_data: Mood analysis the current schedule was built from
+            calendar_events: Calendar events the current schedule was built from,
+                kept at their times
+            current_time: Current time of day, used to tell past entries from future ones
             
         Returns:
             Updated schedule dictionary
@@ -295,34 +605,23 @@ class Life_Scheduler:
         else:
             # Normalize time formats in new events
             new_events = self.preprocess_events(new_events)
+        calendar_events = self.preprocess_events(calendar_events) if calendar_events else []
+        if current_time:
+            current_time = self.normalize_time_format(current_time)
+            
+        if new_events and self.mood_unchanged(previous_mood_data, new_mood_data):
+            with profiler.stage("adjust.local"):
+                local_result = self.adjust_locally(current_schedule, completed_activities, new_events,
+                                                   calendar_events, current_time)
+            if local_result is not None:
+                return local_result
             
-        task_description = f"""
-        Adjust the existing daily schedule based on the following changes:
-        
-        CURRENT SCHEDULE:
-        {json.dumps(current_schedule, indent=2)}
-        
-        UPDATED MOOD ANALYSIS:
-        {json.dumps(new_mood_data, indent=2)}
-        
-        COMPLETED ACTIVITIES:
-        {json.dumps(completed_activities, indent=2)}
-        
-        NEW EVENTS TO INCORPORATE:
-        {json.dumps(new_events, indent=2)}
-        
-        Modify the remaining schedule to account for the user's changed mood/energy
-        and any new events, while ensuring they still accomplish their important goals.
-        Remember to maintain a good balance between work activities and personal time,
-        especially for evening activities.
-        """
-        
         task = Task(
-            description=task_description,
+            description=self.build_adjust_description(
+                current_schedule, new_mood_data, completed_activities, new_events
+            ),
             agent=self.Life_Scheduler_Agent,
-            expected_output="""A JSON string with the updated schedule in the same format as the original,
-            plus a change_summary field explaining the adjustments made and why.
-            """
+            expected_output=SCHEDULE_EXPECTED_OUTPUT
         )
         
         crew = Crew(
@@ -331,8 +630,12 @@ class Life_Scheduler:
             process=Process.sequential
         )
         
-        results = crew.kickoff()
-        return parse_json_response(str(results))
+        with profiler.stage("adjust.crew_kickoff"):
+            results = crew.kickoff()
+        with profiler.stage("adjust.parse_json"):
+            result = parse_json_response(str(results))
+        with profiler.stage("adjust.validate"):
+            return self.validate_and_repair(result, calendar_events + new_events)
     
     def create_custom_schedule(self, 
                          tasks: List[Dict],
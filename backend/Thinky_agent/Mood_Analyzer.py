@@ -1,9 +1,12 @@
 import os 
+import copy
 import json 
 from typing import List, Dict 
 from dotenv import load_dotenv
-from tavily import TavilyClient 
 from .utils import parse_json_response
+from .semantic_cache import SemanticCache
+from .shared_state import get_shared_state
+from .profiler import profiler
 from crewai import Agent, Task, Crew, Process
  
 # load Configuration
@@ -11,11 +14,27 @@ load_dotenv()
 
 # keys
 # OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-TAVILY_API = os.getenv("TAVILY_API_KEY")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("THINKY_SEMANTIC_CACHE_THRESHOLD", "0.8"))
+
+# Fixed instructions first, the user's text last (see prompt_layout.py)
+MOOD_INSTRUCTIONS = """Assess the user's mood from the text at the end of this task and return the results in JSON format.
+
+Return a JSON string in the format
+{
+    "Mood tags":["<mood1>","<mood2>", ...],
+    "Energy":"<low/medium/High>",
+    "Cravings":["spicy food", ...],
+    "confidence score":"High/Low/Medium",
+    "personalized tips": "..."
+}
+"""
+
+MOOD_EXPECTED_OUTPUT = "A JSON string in the format specified in the task instructions."
 
 class Mood_Analyzer:
     def __init__(self):
-        self.tavily_client = TavilyClient(api_key = TAVILY_API)
+        # Near-duplicate mood texts reuse a previous analysis instead of calling the model
+        self.semantic_cache = SemanticCache(threshold=SEMANTIC_CACHE_THRESHOLD, shared=get_shared_state())
         self.setup_agents()
         
     def setup_agents(self):
@@ -45,19 +64,25 @@ class Mood_Analyzer:
             allow_delegation = False,
         )
             
-    def analyze_mood(self, topic : str) -> Dict:
+    @staticmethod
+    def build_task_description(topic: str) -> str:
+        """Task description with the fixed instructions first and the user's text last."""
+        return MOOD_INSTRUCTIONS + "\nUSER TEXT:\n" + topic
+        
+    def analyze_mood(self, topic : str, use_cache: bool = True) -> Dict:
+        if use_cache:
+            with profiler.stage("mood.semantic_cache"):
+                cached = self.semantic_cache.lookup(topic)
+            if cached is not None:
+                return copy.deepcopy(cached)
+        return self.run_analysis(topic, store=use_cache)
+        
+    def run_analysis(self, topic: str, store: bool = True) -> Dict:
+        """Analyze ``topic`` with the model without a cache lookup, storing the result unless ``store`` is False."""
         task = Task(
-            description = f"Access the user's Mood for: {topic} return the results in JSON format",
+            description = self.build_task_description(topic),
             agent=self.Mood_Analyzer_Agent,
-            expected_output="""A JSON string in the format
-            {
-                "Mood tags":["<mood1>","<mood2>", ...],
-                "Energy":"<low/medium/High>,
-                "Cravings":["spicy food", ...]
-                "confidence score":"High/Low/Medium",
-                "personalized tips": "..."
-            }
-            """
+            expected_output=MOOD_EXPECTED_OUTPUT
         )
         crew = Crew(
             agents = [self.Mood_Analyzer_Agent],
@@ -65,8 +90,13 @@ class Mood_Analyzer:
             process = Process.sequential
         )
         
-        results = crew.kickoff()
-        return parse_json_response(str(results))
+        with profiler.stage("mood.crew_kickoff"):
+            results = crew.kickoff()
+        with profiler.stage("mood.parse_json"):
+            result = parse_json_response(str(results))
+        if store and "error" not in result:
+            self.semantic_cache.store(topic, copy.deepcopy(result))
+        return result
         
 if __name__ == '__main__':
     m_analyzer = Mood_Analyzer()
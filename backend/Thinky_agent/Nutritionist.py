@@ -1,8 +1,9 @@
 import os 
 import json 
 from dotenv import load_dotenv
-from tavily import TavilyClient 
 from .utils import parse_json_response
+from .search import get_search_enricher
+from .profiler import profiler
 from typing import List, Dict, Optional
 from crewai import Agent, Task, Crew, Process
  
@@ -12,8 +13,47 @@ load_dotenv()
 # keys
 # OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 
+# Fixed instructions first, the profile last (see prompt_layout.py)
+NUTRITION_INSTRUCTIONS = """You are the Thinky Nutritionist Agent.
+
+Based on the user profile at the end of this task, generate a healthy, home-based, budget-friendly one-day meal plan.
+Your plan must consider the user's mood, energy, cravings, medical conditions, dietary restrictions, and goals.
+
+--- Output Format ---
+Return a JSON string in the following format:
+{
+    "meal_plan": {
+        "breakfast": {
+            "recipe": "...",
+            "purpose": "...",
+            "prep_time": "..."
+        },
+        "lunch": {
+            "recipe": "...",
+            "purpose": "...",
+            "prep_time": "..."
+        },
+        "dinner": {
+            "recipe": "...",
+            "purpose": "...",
+            "prep_time": "..."
+        },
+        "snack": {
+            "recipe": "...",
+            "purpose": "...",
+            "prep_time": "..."
+        }
+    },
+    "grocery_list": ["item1", "item2", ...],
+    "summary": "..."
+}
+"""
+
+NUTRITION_EXPECTED_OUTPUT = "A JSON string containing a personalized one-day meal plan and grocery list."
+
 class Nutritionist:
     def __init__(self):
+        self.search_enricher = get_search_enricher()
         self.setup_agents()
         
     def setup_agents(self):
@@ -49,66 +89,61 @@ class Nutritionist:
             allow_delegation = False,
         )
             
+    def research_notes(
+        self,
+        mood_data: Dict,
+        medical_conditions: Optional[List[str]] = None,
+        dietary_preferences: Optional[List[str]] = None
+    ) -> str:
+        """Look up condition- and diet-specific guidance via cached web search."""
+        queries = [f"{condition} diet guidelines foods to eat and avoid" for condition in (medical_conditions or [])[:3]]
+        diet = " ".join(dietary_preferences or [])
+        for craving in (mood_data.get("Cravings") or [])[:2]:
+            queries.append(" ".join(f"healthy homemade {diet} recipe for {craving} craving".split()))
+        return self.search_enricher.enrichment_text(queries)
+
+    @staticmethod
+    def build_task_description(
+        mood_data: Dict,
+        medical_conditions: Optional[List[str]] = None,
+        dietary_preferences: Optional[List[str]] = None,
+        allergies: Optional[List[str]] = None,
+        goals: Optional[str] = None,
+        research: str = ""
+    ) -> str:
+        """Task description with the fixed instructions first and the user profile last."""
+        profile = f"""--- User Profile ---
+Mood: {mood_data.get("Mood", [])}
+Energy: {mood_data.get("Energy", "")}
+Cravings: {mood_data.get("Cravings", [])}
+Confidence: {mood_data.get("Confidence", "")}
+Notes: {mood_data.get("Notes", "")}
+Medical Conditions: {medical_conditions or []}
+Dietary Preferences: {dietary_preferences or []}
+Allergies: {allergies or []}
+Goals: {goals or "None"}"""
+        if research:
+            profile += f"\n\n--- Background Research (use where relevant) ---\n{research}"
+        return NUTRITION_INSTRUCTIONS + "\n" + profile
+
     def nutritional(
         self,
         mood_data: Dict,
         medical_conditions: Optional[List[str]] = None,
         dietary_preferences: Optional[List[str]] = None,
         allergies: Optional[List[str]] = None,
-        goals: Optional[str] = None
+        goals: Optional[str] = None,
+        enrich: bool = False
     ) -> Dict:
-        # Prepare the detailed task description
-        task_description = f"""
-        You are the Thinky Nutritionist Agent.
-
-        Based on the following user profile, generate a healthy, home-based, budget-friendly one-day meal plan.
-        Your plan must consider the user's mood, energy, cravings, medical conditions, dietary restrictions, and goals.
-
-        --- User Profile ---
-        Mood: {mood_data.get("Mood", [])}
-        Energy: {mood_data.get("Energy", "")}
-        Cravings: {mood_data.get("Cravings", [])}
-        Confidence: {mood_data.get("Confidence", "")}
-        Notes: {mood_data.get("Notes", "")}
-        Medical Conditions: {medical_conditions or []}
-        Dietary Preferences: {dietary_preferences or []}
-        Allergies: {allergies or []}
-        Goals: {goals or "None"}
-
-        --- Output Format ---
-        Return a JSON string in the following format:
-        {{
-            "meal_plan": {{
-                "breakfast": {{
-                    "recipe": "...",
-                    "purpose": "...",
-                    "prep_time": "..."
-                }},
-                "lunch": {{
-                    "recipe": "...",
-                    "purpose": "...",
-                    "prep_time": "..."
-                }},
-                "dinner": {{
-                    "recipe": "...",
-                    "purpose": "...",
-                    "prep_time": "..."
-                }},
-                "snack": {{
-                    "recipe": "...",
-                    "purpose": "...",
-                    "prep_time": "..."
-                }}
-            }},
-            "grocery_list": ["item1", "item2", ...],
-            "summary": "..."
-        }}
-        """
+        with profiler.stage("nutrition.research"):
+            research = self.research_notes(mood_data, medical_conditions, dietary_preferences) if enrich else ""
 
         task = Task(
-            description=task_description,
+            description=self.build_task_description(
+                mood_data, medical_conditions, dietary_preferences, allergies, goals, research
+            ),
             agent=self.Nutritionist_Agent,
-            expected_output="A JSON string containing a personalized one-day meal plan and grocery list."
+            expected_output=NUTRITION_EXPECTED_OUTPUT
         )
 
         crew = Crew(
@@ -117,8 +152,10 @@ class Nutritionist:
             process=Process.sequential
         )
 
-        results = crew.kickoff()
-        return parse_json_response(str(results))
+        with profiler.stage("nutrition.crew_kickoff"):
+            results = crew.kickoff()
+        with profiler.stage("nutrition.parse_json"):
+            return parse_json_response(str(results))
 
 
         
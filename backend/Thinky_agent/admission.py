@@ -0,0 +1,238 @@
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted for agent execution."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(AdmissionRejected):
+    """Raised when a client has exhausted its token bucket."""
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens per second."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_consume(self, now: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Take ``cost`` tokens if available.
+
+        Returns:
+            Tuple of (allowed, seconds until enough tokens would be available)
+        """
+        # ``now`` may have been read just before the bucket was created
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True, 0.0
+        return False, (cost - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class _ClassMetrics:
+    __slots__ = ("admitted", "rate_limited", "rejected", "wait_total", "wait_max", "recent_waits")
+
+    def __init__(self):
+        self.admitted = 0
+        self.rate_limited = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=512)
+
+    def snapshot(self) -> Dict:
+        waits = sorted(self.recent_waits)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(1000 * self.wait_total / self.admitted, 2) if self.admitted else 0.0,
+            "p50_wait_ms": round(1000 * percentile(0.50), 2),
+            "p95_wait_ms": round(1000 * percentile(0.95), 2),
+            "max_wait_ms": round(1000 * self.wait_max, 2),
+        }
+
+
+class AdmissionController:
+    """
+    Per-client rate limiting plus a weighted priority queue in front of agent execution.
+
+    At most ``max_concurrency`` agent runs proceed at once. Requests beyond that
+    wait in one queue per priority class, and free slots are handed out with
+    smooth weighted round-robin so interactive traffic is served first without
+    starving bulk work entirely.
+
+    Concurrency and queues are per process. With a ``shared`` store the token
+    buckets are kept in SQLite, so a client's rate limit holds across all workers.
+    """
+
+    DEFAULT_WEIGHTS = {"interactive": 6, "standard": 3, "bulk": 1}
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 weights: Optional[Dict[str, int]] = None,
+                 rate_per_second: float = 0.5,
+                 burst: float = 10,
+                 max_queue: int = 256,
+                 queue_timeout: float = 60.0,
+                 max_clients: int = 10000,
+                 shared=None):
+        self.max_concurrency = max_concurrency
+        self.weights = dict(weights or self.DEFAULT_WEIGHTS)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queues = {name: deque() for name in self.weights}
+        self._current = {name: 0 for name in self.weights}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._metrics = {name: _ClassMetrics() for name in self.weights}
+
+    def _queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _check_rate(self, client_id: str, now: float) -> Tuple[bool, float]:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, self.burst)
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client_id)
+        return bucket.try_consume(now)
+
+    def _next_class(self) -> Optional[str]:
+        # Smooth weighted round-robin over the non-empty queues
+        ready = [name for name, q in self._queues.items() if q]
+        if not ready:
+            return None
+        total = 0
+        for name in ready:
+            self._current[name] += self.weights[name]
+            total += self.weights[name]
+        chosen = max(ready, key=lambda name: self._current[name])
+        self._current[chosen] -= total
+        return chosen
+
+    def _dispatch(self) -> None:
+        while self._active < self.max_concurrency:
+            name = self._next_class()
+            if name is None:
+                return
+            waiter = self._queues[name].popleft()
+            waiter.granted = True
+            self._active += 1
+            waiter.event.set()
+
+    def _record_wait(self, priority: str, waited: float) -> None:
+        metrics = self._metrics[priority]
+        metrics.admitted += 1
+        metrics.wait_total += waited
+        metrics.wait_max = max(metrics.wait_max, waited)
+        metrics.recent_waits.append(waited)
+
+    def acquire(self, client_id: str, priority: str) -> float:
+        """
+        Block until the request may run.
+
+        Args:
+            client_id: Identifier used for per-client rate limiting
+            priority: Priority class name, one of the configured weights
+
+        Returns:
+            Seconds spent waiting in the queue
+        """
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        start = time.monotonic()
+        if self.shared is not None:
+            allowed, retry_after = self.shared.take_token(client_id, self.rate_per_second, self.burst)
+        with self._lock:
+            if self.shared is None:
+                allowed, retry_after = self._check_rate(client_id, start)
+            if not allowed:
+                self._metrics[priority].rate_limited += 1
+                raise RateLimited(f"Rate limit exceeded for client '{client_id}'", retry_after)
+
+            if self._active < self.max_concurrency and self._queued() == 0:
+                self._active += 1
+                self._record_wait(priority, 0.0)
+                return 0.0
+
+            if self._queued() >= self.max_queue:
+                self._metrics[priority].rejected += 1
+                raise AdmissionRejected("Server is at capacity, please retry later")
+
+            waiter = _Waiter()
+            self._queues[priority].append(waiter)
+
+        waiter.event.wait(self.queue_timeout)
+        with self._lock:
+            waited = time.monotonic() - start
+            if not waiter.granted:
+                self._queues[priority].remove(waiter)
+                self._metrics[priority].rejected += 1
+                raise AdmissionRejected("Timed out waiting for an execution slot")
+            self._record_wait(priority, waited)
+        return waited
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self._dispatch()
+
+    @contextmanager
+    def admit(self, client_id: str, priority: str):
+        """Context manager holding an execution slot for the duration of the block."""
+        waited = self.acquire(client_id, priority)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "worker_pid": os.getpid(),
+                "max_concurrency": self.max_concurrency,
+                "active": self._active,
+                "queued": {name: len(q) for name, q in self._queues.items()},
+                "classes": {name: m.snapshot() for name, m in self._metrics.items()},
+            }
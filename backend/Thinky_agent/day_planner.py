@@ -0,0 +1,132 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+from .profiler import profiler
+
+
+def nutrition_mood_data(mood_result: Dict) -> Dict:
+    """Map Mood_Analyzer output onto the keys the Nutritionist prompt reads."""
+    if not isinstance(mood_result, dict):
+        return {}
+    mood_data = dict(mood_result)
+    mood_data.setdefault("Mood", mood_result.get("Mood tags", []))
+    mood_data.setdefault("Confidence", mood_result.get("confidence score", ""))
+    mood_data.setdefault("Notes", mood_result.get("personalized tips", ""))
+    return mood_data
+
+
+def align_meal_times(schedule_result: Dict, nutrition_result: Dict, preferences: Optional[Dict] = None) -> None:
+    """
+    Attach the schedule's meal slots to the meal plan, and the recipes to the schedule.
+
+    Each meal in the plan gets the "time" of the matching schedule entry, falling
+    back to the preferred meal time, and the matching schedule entry gets the
+    recipe name under "meal_plan_recipe". Both results are updated in place.
+    """
+    meal_plan = nutrition_result.get("meal_plan") if isinstance(nutrition_result, dict) else None
+    schedule = schedule_result.get("schedule") if isinstance(schedule_result, dict) else None
+    if not isinstance(meal_plan, dict):
+        return
+    if not isinstance(schedule, list):
+        schedule = []
+    preferred = (preferences or {}).get("preferred_meal_times") or {}
+
+    for meal, details in meal_plan.items():
+        if not isinstance(details, dict):
+            continue
+        slot = next((entry for entry in schedule if isinstance(entry, dict) and
+                     meal.lower() in str(entry.get("activity", "")).lower()), None)
+        if slot is not None:
+            details["time"] = slot.get("time")
+            if details.get("recipe"):
+                slot["meal_plan_recipe"] = details["recipe"]
+        elif meal in preferred:
+            details["time"] = preferred[meal]
+
+
+class DayPlanner:
+    """
+    Full daily plan from one mood analysis.
+
+    The mood is analyzed once, then the schedule and the meal plan are generated
+    concurrently, so the end-to-end time is one mood call plus the slower of the
+    two generators.
+    """
+
+    def __init__(self, mood_analyzer, life_scheduler, nutritionist, max_workers: int = 8):
+        self.mood_analyzer = mood_analyzer
+        self.life_scheduler = life_scheduler
+        self.nutritionist = nutritionist
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-day")
+
+    def plan_day(self,
+                 mood_text: str,
+                 daily_goals: Optional[List[str]] = None,
+                 calendar_events: Optional[List[Dict]] = None,
+                 preferences: Optional[Dict] = None,
+                 medical_conditions: Optional[List[str]] = None,
+                 dietary_preferences: Optional[List[str]] = None,
+                 allergies: Optional[List[str]] = None,
+                 nutrition_goals: Optional[str] = None,
+                 enrich: bool = False) -> Dict:
+        """
+        Create a schedule and a meal plan for the day.
+
+        Args:
+            mood_text: The user's free-text mood description
+            daily_goals: List of goals the user wants to accomplish today
+            calendar_events: List of existing calendar events to incorporate
+            preferences: Dictionary of user preferences for scheduling, or a stored profile's preferences
+            medical_conditions: Medical conditions the meal plan must respect
+            dietary_preferences: Dietary preferences such as vegetarian
+            allergies: Ingredients to avoid
+            nutrition_goals: Nutrition goals for the day
+            enrich: Ground both generators with cached web search results
+
+        Returns:
+            Dictionary with the mood analysis, schedule, meal plan and stage timings in ms
+        """
+        start = time.perf_counter()
+        mood_result = self.mood_analyzer.analyze_mood(topic=mood_text)
+        mood_done = time.perf_counter()
+
+        def timed(func, **kwargs):
+            began = time.perf_counter()
+            result = func(**kwargs)
+            return result, time.perf_counter() - began
+
+        schedule_future = self._pool.submit(
+            profiler.bind(timed), self.life_scheduler.create_schedule,
+            mood_data=mood_result,
+            daily_goals=daily_goals,
+            calendar_events=calendar_events,
+            preferences=preferences,
+            enrich=enrich
+        )
+        nutrition_future = self._pool.submit(
+            profiler.bind(timed), self.nutritionist.nutritional,
+            mood_data=nutrition_mood_data(mood_result),
+            medical_conditions=medical_conditions,
+            dietary_preferences=dietary_preferences,
+            allergies=allergies,
+            goals=nutrition_goals,
+            enrich=enrich
+        )
+        schedule_result, schedule_seconds = schedule_future.result()
+        nutrition_result, nutrition_seconds = nutrition_future.result()
+
+        align_meal_times(schedule_result, nutrition_result,
+                         self.life_scheduler.normalize_preferences(preferences))
+
+        return {
+            "mood_analysis": mood_result,
+            "schedule": schedule_result,
+            "nutrition_plan": nutrition_result,
+            "timings_ms": {
+                "mood_analysis": round(1000 * (mood_done - start), 1),
+                "schedule": round(1000 * schedule_seconds, 1),
+                "nutrition_plan": round(1000 * nutrition_seconds, 1),
+                "total": round(1000 * (time.perf_counter() - start), 1),
+            },
+        }
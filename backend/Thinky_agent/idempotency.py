@@ -0,0 +1,209 @@
+import time
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+
+class IdempotencyInProgress(RuntimeError):
+    """Raised when a duplicate request gives up waiting for the original to finish."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "created", "done", "result", "failed")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.created = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+def is_error_result(result: Any) -> bool:
+    """
+    Whether a handler result carries an agent error, at the top level or one level down.
+
+    The agents return {"error": ..., "raw_response": ...} when the model output
+    cannot be parsed; such results must not be replayed to a retrying client.
+    """
+    if not isinstance(result, dict):
+        return False
+    return "error" in result or any(isinstance(value, dict) and "error" in value for value in result.values())
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a JSON-serializable request payload."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Bounded, TTL'd store of responses keyed by (client, scope, Idempotency-Key).
+
+    The first request for a key runs the handler and stores its result, replays
+    return the stored result immediately and concurrent duplicates wait up to
+    ``wait_timeout`` for the original to finish. Failed runs and agent error
+    results are not stored, so a retry after an error executes again.
+
+    With a ``shared`` store the records live in SQLite instead, so a retry that
+    lands on another worker process is still replayed.
+    """
+
+    def __init__(self,
+                 max_entries: int = 1024,
+                 ttl_seconds: float = 24 * 60 * 60,
+                 shared=None,
+                 stale_seconds: float = 600.0,
+                 wait_timeout: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.wait_timeout = wait_timeout
+        self.shared = shared
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, now: float) -> None:
+        # Entries are kept in insertion order, so expired ones sit at the front
+        for key in list(self._entries):
+            entry = self._entries[key]
+            expired = now - entry.created > self.ttl_seconds
+            if not expired and len(self._entries) <= self.max_entries:
+                break
+            # Never drop an in-flight entry, waiters depend on it
+            if entry.done.is_set():
+                del self._entries[key]
+
+    def run(self,
+            key: Optional[str],
+            scope: str,
+            fingerprint: str,
+            func: Callable[[], Any],
+            client_id: str = "") -> Tuple[Any, bool]:
+        """
+        Execute ``func`` at most once per idempotency key.
+
+        Args:
+            key: Value of the Idempotency-Key header, or None to bypass the store
+            scope: Namespace for the key, typically the endpoint path
+            fingerprint: Hash of the request body, used to detect key reuse
+            func: Zero-argument callable producing the response
+            client_id: Identity of the caller, so clients never share responses
+
+        Returns:
+            Tuple of (result, replayed) where replayed is True if the result was
+            served from the store instead of being computed by this call
+
+        Raises:
+            IdempotencyConflict: If the key was used with a different body
+            IdempotencyInProgress: If the original request is still running
+                after ``wait_timeout`` seconds
+        """
+        if not key:
+            return func(), False
+        if self.shared is not None:
+            return self._run_shared(key, f"{client_id} {scope}", fingerprint, func)
+
+        store_key = (client_id, scope, key)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                entry = self._entries.get(store_key)
+                if entry is not None and entry.done.is_set() and now - entry.created > self.ttl_seconds:
+                    del self._entries[store_key]
+                    entry = None
+                if entry is None:
+                    entry = _Entry(fingerprint)
+                    self._entries[store_key] = entry
+                    self._evict(now)
+                    self.misses += 1
+                    owner = True
+                else:
+                    if entry.fingerprint != fingerprint:
+                        raise IdempotencyConflict(
+                            f"Idempotency-Key '{key}' was already used with a different request body"
+                        )
+                    owner = False
+
+            if owner:
+                try:
+                    entry.result = func()
+                    entry.failed = is_error_result(entry.result)
+                except BaseException:
+                    entry.failed = True
+                    raise
+                finally:
+                    if entry.failed:
+                        with self._lock:
+                            if self._entries.get(store_key) is entry:
+                                del self._entries[store_key]
+                    entry.done.set()
+                return entry.result, False
+
+            if not entry.done.wait(self.wait_timeout):
+                raise IdempotencyInProgress(f"A request with Idempotency-Key '{key}' is still in progress")
+            if entry.failed:
+                # The original attempt errored; retry as a fresh request
+                continue
+            with self._lock:
+                self.hits += 1
+            return entry.result, True
+
+    def _run_shared(self, key: str, scope: str, fingerprint: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        delay = 0.05
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            state, result = self.shared.claim_idempotency(scope, key, fingerprint,
+                                                          self.ttl_seconds, self.stale_seconds)
+            if state == "conflict":
+                raise IdempotencyConflict(
+                    f"Idempotency-Key '{key}' was already used with a different request body"
+                )
+            if state == "done":
+                self.shared.incr("idempotency.hits")
+                return result, True
+            if state == "owner":
+                self.shared.incr("idempotency.misses")
+                try:
+                    result = func()
+                except BaseException:
+                    self.shared.abandon_idempotency(scope, key)
+                    raise
+                if is_error_result(result):
+                    self.shared.abandon_idempotency(scope, key)
+                else:
+                    self.shared.complete_idempotency(scope, key, result)
+                return result, False
+
+            # Another worker is running the original request
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress(f"A request with Idempotency-Key '{key}' is still in progress")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def stats(self) -> Dict:
+        if self.shared is not None:
+            counters = self.shared.counters("idempotency.")
+            return {
+                "shared": True,
+                "hits": counters.get("hits", 0),
+                "misses": counters.get("misses", 0),
+                "ttl_seconds": self.ttl_seconds,
+            }
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,238 @@
+import os
+import time
+import struct
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
+MOOD_TAGS = [
+    "happy",
+    "sad",
+    "excited",
+    "tired",
+    "anxious",
+    "angry",
+    "calm",
+    "bored",
+    "stressed",
+    "nostalgic",
+    "romantic",
+    "celebratory",
+    "craving_sweets",
+    "craving_spicy",
+    "craving_comfort_food",
+    "other",
+]
+ENERGY_LEVELS = ["low", "medium", "high"]
+
+_TAG_BITS = {tag: 1 << index for index, tag in enumerate(MOOD_TAGS)}
+_OTHER_BIT = _TAG_BITS["other"]
+
+# One record per analysis: timestamp, mood tag bitmask, energy level (-1 if unknown)
+_RECORD = struct.Struct("<dIb")
+
+
+def encode_mood(mood_data: Dict) -> tuple:
+    """Convert a mood analysis into a (tag bitmask, energy code) pair."""
+    tags = mood_data.get("Mood tags") or mood_data.get("Mood") or []
+    if isinstance(tags, str):
+        tags = [tags]
+    mask = 0
+    for tag in tags:
+        mask |= _TAG_BITS.get(str(tag).strip().lower().replace(" ", "_"), _OTHER_BIT)
+    energy = str(mood_data.get("Energy", "")).strip().lower()
+    return mask, ENERGY_LEVELS.index(energy) if energy in ENERGY_LEVELS else -1
+
+
+class _UserHistory:
+    """Array-backed history of one user plus its incrementally maintained aggregates."""
+
+    __slots__ = ("timestamps", "masks", "energies", "tag_counts", "energy_counts",
+                 "window_start", "window_tag_counts", "window_energy_counts",
+                 "tag_runs", "last_day", "day_streak", "longest_day_streak", "offset")
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.masks = array("I")
+        self.energies = array("b")
+        self.tag_counts = [0] * len(MOOD_TAGS)
+        self.energy_counts = [0] * len(ENERGY_LEVELS)
+        self.window_start = 0
+        self.window_tag_counts = [0] * len(MOOD_TAGS)
+        self.window_energy_counts = [0] * len(ENERGY_LEVELS)
+        self.tag_runs = [0] * len(MOOD_TAGS)
+        self.last_day = None
+        self.day_streak = 0
+        self.longest_day_streak = 0
+        # Bytes of the history file already applied
+        self.offset = 0
+
+    def add(self, timestamp: float, mask: int, energy: int) -> None:
+        self.timestamps.append(timestamp)
+        self.masks.append(mask)
+        self.energies.append(energy)
+
+        for index in range(len(MOOD_TAGS)):
+            if mask >> index & 1:
+                self.tag_counts[index] += 1
+                self.window_tag_counts[index] += 1
+                self.tag_runs[index] += 1
+            else:
+                self.tag_runs[index] = 0
+        if energy >= 0:
+            self.energy_counts[energy] += 1
+            self.window_energy_counts[energy] += 1
+
+        day = int(timestamp // 86400)
+        if self.last_day is None or day > self.last_day + 1:
+            self.day_streak = 1
+        elif day == self.last_day + 1:
+            self.day_streak += 1
+        if self.last_day is None or day > self.last_day:
+            self.last_day = day
+        self.longest_day_streak = max(self.longest_day_streak, self.day_streak)
+
+    def advance_window(self, cutoff: float) -> None:
+        # Each entry leaves the window once, so this is amortized O(1) per append
+        while self.window_start < len(self.timestamps) and self.timestamps[self.window_start] < cutoff:
+            mask = self.masks[self.window_start]
+            for index in range(len(MOOD_TAGS)):
+                if mask >> index & 1:
+                    self.window_tag_counts[index] -= 1
+            energy = self.energies[self.window_start]
+            if energy >= 0:
+                self.window_energy_counts[energy] -= 1
+            self.window_start += 1
+
+
+class MoodHistoryStore:
+    """
+    Append-only per-user mood history persisted as fixed-size binary records.
+
+    Aggregates (tag counts, energy distribution, rolling window counts and
+    streaks) are updated on every append, so trend queries never rescan history.
+    The files are the source of truth; at most ``max_users`` histories are kept
+    in memory and the least recently used ones are rebuilt from disk on demand.
+    """
+
+    def __init__(self, data_dir: Optional[str] = None, window_days: int = 7, max_users: int = 10000):
+        self.data_dir = data_dir or os.path.join(os.getenv("THINKY_DATA_DIR", "data"), "mood_history")
+        self.window_seconds = window_days * 86400
+        self.window_days = window_days
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _UserHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _path(self, user_id: str) -> str:
+        # Hash the id so arbitrary user ids map to safe file names
+        return os.path.join(self.data_dir, hashlib.sha1(user_id.encode("utf-8")).hexdigest() + ".bin")
+
+    def _load(self, user_id: str) -> Optional[_UserHistory]:
+        """The user's history, or None if nothing was ever recorded for them."""
+        # The file is the source of truth: other worker processes append to it
+        # too, so apply any records added since the last read
+        path = self._path(user_id)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            self._users.pop(user_id, None)
+            return None
+
+        history = self._users.get(user_id)
+        if history is None:
+            history = _UserHistory()
+            self._users[user_id] = history
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        usable = size - size % _RECORD.size
+        if usable > history.offset:
+            with open(path, "rb") as f:
+                f.seek(history.offset)
+                data = f.read(usable - history.offset)
+            for timestamp, mask, energy in _RECORD.iter_unpack(data):
+                history.add(timestamp, mask, energy)
+            history.offset = usable
+        return history
+
+    def record(self, user_id: str, mood_data: Dict, timestamp: Optional[float] = None) -> None:
+        """
+        Append a mood analysis to the user's history.
+
+        Args:
+            user_id: Identifier of the user
+            mood_data: Mood analysis result with "Mood tags" and "Energy"
+            timestamp: Unix time of the analysis, defaults to now
+        """
+        if not isinstance(mood_data, dict) or "error" in mood_data:
+            return
+        mask, energy = encode_mood(mood_data)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            history = self._load(user_id)
+            if history is not None and len(history.timestamps) and timestamp < history.timestamps[-1]:
+                # Keep the history sorted so the rolling window can advance in order
+                timestamp = history.timestamps[-1]
+            with open(self._path(user_id), "ab") as f:
+                f.write(_RECORD.pack(timestamp, mask, energy))
+            # Read the record back with anything other processes appended meanwhile
+            self._load(user_id)
+
+    def delete(self, user_id: str) -> None:
+        """Remove the user's history from memory and disk."""
+        with self._lock:
+            self._users.pop(user_id, None)
+            try:
+                os.remove(self._path(user_id))
+            except OSError:
+                pass
+
+    def trends(self, user_id: str, now: Optional[float] = None) -> Dict:
+        """
+        Summarize a user's mood history from the maintained aggregates.
+
+        Args:
+            user_id: Identifier of the user
+            now: Reference Unix time for the rolling window, defaults to now
+
+        Returns:
+            Dictionary of all-time and rolling-window counts and streaks
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # Unknown users get empty trends without being cached
+            history = self._load(user_id) or _UserHistory()
+            history.advance_window(now - self.window_seconds)
+            total = len(history.timestamps)
+            today = int(now // 86400)
+            current_streak = history.day_streak if history.last_day is not None and today - history.last_day <= 1 else 0
+
+            def counts(values: List[int], names: List[str]) -> Dict[str, int]:
+                return {name: count for name, count in zip(names, values) if count}
+
+            last = None
+            if total:
+                last = {
+                    "timestamp": history.timestamps[-1],
+                    "mood_tags": [tag for index, tag in enumerate(MOOD_TAGS) if history.masks[-1] >> index & 1],
+                    "energy": ENERGY_LEVELS[history.energies[-1]] if history.energies[-1] >= 0 else None,
+                }
+
+            return {
+                "user_id": user_id,
+                "total_entries": total,
+                "mood_tag_counts": counts(history.tag_counts, MOOD_TAGS),
+                "energy_distribution": counts(history.energy_counts, ENERGY_LEVELS),
+                "window_days": self.window_days,
+                "window_entries": total - history.window_start,
+                "window_mood_tag_counts": counts(history.window_tag_counts, MOOD_TAGS),
+                "window_energy_distribution": counts(history.window_energy_counts, ENERGY_LEVELS),
+                "current_tag_streaks": counts(history.tag_runs, MOOD_TAGS),
+                "current_day_streak": current_streak,
+                "longest_day_streak": history.longest_day_streak,
+                "last_entry": last,
+            }
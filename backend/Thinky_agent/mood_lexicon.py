@@ -0,0 +1,85 @@
+import re
+from typing import List, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+|[.,;:!?]")
+# Words that carry no mood; they neither count as content nor use up a negation's scope
+FILLER_WORDS = frozenset({
+    "a", "an", "and", "the", "i", "im", "i'm", "am", "is", "are", "be", "so", "really", "very",
+    "to", "of", "but", "just", "my", "me", "it", "feel", "feeling", "some", "for", "like",
+})
+_NEGATORS = frozenset({"not", "no", "never", "nothing", "without", "hardly", "barely", "nor", "neither"})
+# Clause boundaries end a negation's scope, e.g. "not tired, but hungry"
+_CLAUSE_BREAKS = frozenset({".", ",", ";", ":", "!", "?", "but", "though", "although", "yet"})
+_NEGATION_SCOPE = 3
+
+# Whole-word cues for each predefined mood; multi-word cues must appear as a phrase
+MOOD_KEYWORDS = {
+    "happy": ["happy", "glad", "great", "good day", "joy", "joyful", "awesome", "good mood",
+              "enjoy", "enjoyed", "enjoying"],
+    "sad": ["sad", "down", "lonely", "unhappy", "cry", "crying", "cried", "upset", "depressed"],
+    "excited": ["excited", "thrilled", "can't wait", "cant wait", "pumped", "determined"],
+    "tired": ["tired", "exhausted", "sleepy", "drained", "slept poorly", "no energy", "fatigue", "fatigued"],
+    "anxious": ["anxious", "nervous", "worried", "uneasy", "panic", "panicking"],
+    "angry": ["angry", "mad", "furious", "annoyed", "frustrated"],
+    "calm": ["calm", "relaxed", "peaceful", "chill"],
+    "bored": ["bored", "boring", "nothing to do"],
+    "stressed": ["stress", "stressed", "stressful", "overwhelmed", "pressure", "deadline", "deadlines",
+                 "too much"],
+    "nostalgic": ["nostalgic", "miss", "missing", "memories", "old days"],
+    "romantic": ["romantic", "date night", "in love", "partner"],
+    "celebratory": ["celebrate", "celebrating", "promotion", "promoted", "birthday", "party", "got my"],
+    "craving_sweets": ["sweet", "sweets", "chocolate", "dessert", "cake", "pastry", "pastries", "sugar",
+                       "ice cream"],
+    "craving_spicy": ["spicy", "chili", "hot wings", "curry"],
+    "craving_comfort_food": ["comfort", "pizza", "mac and cheese", "soup", "fries", "luxurious food"],
+}
+_CUES: List[Tuple[Tuple[str, ...], str]] = [
+    (tuple(cue.split()), mood) for mood, cues in MOOD_KEYWORDS.items() for cue in cues
+]
+
+
+def is_negator(token: str) -> bool:
+    return token in _NEGATORS or token.endswith("n't") or token in ("dont", "cant", "wont", "isnt", "didnt")
+
+
+def scoped_tokens(text: str) -> List[Tuple[str, bool]]:
+    """
+    Lowercased tokens of ``text``, each with whether it falls in a negation's scope.
+
+    A negator ("not", "never", "don't", ...) negates the next three content words
+    of its clause; filler words in between do not count towards the three.
+    """
+    tokens = []
+    scope = 0
+    for token in _TOKEN_RE.findall(text.lower().replace("\u2019", "'")):
+        if token in _CLAUSE_BREAKS:
+            scope = 0
+            tokens.append((token, False))
+        elif is_negator(token):
+            scope = _NEGATION_SCOPE
+            tokens.append((token, False))
+        elif token in FILLER_WORDS:
+            tokens.append((token, False))
+        else:
+            tokens.append((token, scope > 0))
+            scope = max(0, scope - 1)
+    return tokens
+
+
+def moods_in(tokens: List[Tuple[str, bool]]) -> Set[str]:
+    """Moods whose cues appear in ``tokens`` outside a negation's scope."""
+    words = [token for token, _ in tokens]
+    moods = set()
+    for cue, mood in _CUES:
+        size = len(cue)
+        for i in range(len(words) - size + 1):
+            if words[i:i + size] == list(cue) and not tokens[i][1]:
+                moods.add(mood)
+                break
+    return moods
+
+
+def detect_moods(text: str) -> Set[str]:
+    """Moods mentioned in ``text``; negated mentions such as "not tired" do not count."""
+    return moods_in(scoped_tokens(text))
+
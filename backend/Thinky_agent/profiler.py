@@ -0,0 +1,407 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import threading
+import contextvars
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Optional
+
+from .shared_state import get_shared_state
+
+# Request being tracked; a context variable so work handed to pool threads can carry it along
+_current_record = contextvars.ContextVar("thinky_profiler_record", default=None)
+
+
+class _RequestRecord:
+    __slots__ = ("name", "thread_id", "thread_ids", "started", "wall_started", "ended", "stages")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.thread_id = threading.get_ident()
+        # Every thread that ran a stage of this request, including pool threads
+        self.thread_ids = {self.thread_id}
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+        self.ended = None
+        self.stages = []
+
+    @property
+    def duration_ms(self) -> float:
+        return 1000 * ((self.ended or time.monotonic()) - self.started)
+
+
+def _collapse(frame, max_depth: int = 128) -> str:
+    """Render a frame's stack root-first in the collapsed (flamegraph.pl) format."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    On-demand wall-clock sampling profiler for all Python threads.
+
+    Nothing runs until a capture is requested: a time window (every sample is
+    aggregated and written when the window closes) or slow-request capture
+    (recent samples of threads working on a tracked request are kept in a
+    bounded buffer and written only for requests that exceed the latency
+    threshold). Captures are stored as collapsed stacks
+    plus a JSON file with the request's stage timings.
+
+    With a ``shared`` store the capture settings are published there, and every
+    worker process picks them up within ``sync_seconds`` on its next request,
+    so one admin call controls the profiler in all workers. Each worker writes
+    its own captures into the common output directory.
+    """
+
+    def __init__(self,
+                 output_dir: Optional[str] = None,
+                 interval_ms: float = 5.0,
+                 history_seconds: float = 120.0,
+                 max_captures: int = 50,
+                 max_samples: int = 200000,
+                 shared=None,
+                 sync_seconds: float = 1.0):
+        self.output_dir = output_dir or os.path.join(os.getenv("THINKY_DATA_DIR", "data"), "profiles")
+        self.interval_ms = interval_ms
+        self.history_seconds = history_seconds
+        self.max_captures = max_captures
+        self.max_samples = max_samples
+        self.shared = shared
+        self.sync_seconds = sync_seconds
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._window_until = 0.0
+        self._window_started = 0.0
+        self._window_counts = Counter()
+        self._slow_threshold_ms = None
+        # Slow-capture samples are (time, request record, stack id); each
+        # distinct stack string is stored once in _stacks and referenced by index
+        self._samples = deque()
+        self._stack_ids: Dict[str, int] = {}
+        self._stacks: List[str] = []
+        # Threads currently working on tracked requests, innermost request last
+        self._tracked: Dict[int, List[_RequestRecord]] = {}
+        self._capture_seq = 0
+        self._settings_version = 0
+        self._next_sync = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    # Control
+
+    def start_window(self, duration_seconds: float, interval_ms: Optional[float] = None) -> None:
+        """Sample every thread for ``duration_seconds`` and store one aggregated capture."""
+        changes = {"window_until": time.time() + duration_seconds}
+        if interval_ms:
+            changes["interval_ms"] = interval_ms
+        self._publish(changes)
+
+    def enable_slow_capture(self, threshold_ms: float, interval_ms: Optional[float] = None) -> None:
+        """Keep sampling and store a capture for every request slower than ``threshold_ms``."""
+        changes = {"slow_threshold_ms": threshold_ms}
+        if interval_ms:
+            changes["interval_ms"] = interval_ms
+        self._publish(changes)
+
+    def disable_slow_capture(self) -> None:
+        self._publish({"slow_threshold_ms": None})
+
+    def _publish(self, changes: Dict) -> None:
+        if self.shared is None:
+            self._apply(changes)
+            return
+        version, settings = self.shared.merge_setting("profiler", changes)
+        self._apply(settings, version)
+
+    def _sync(self) -> None:
+        """Apply settings published by any worker since the last check."""
+        self._next_sync = time.monotonic() + self.sync_seconds
+        try:
+            current = self.shared.get_setting("profiler")
+        except sqlite3.Error as e:
+            print(f"Warning: could not read profiler settings: {e}")
+            return
+        if current is not None and current[0] > self._settings_version:
+            self._apply(current[1], current[0])
+
+    def _apply(self, settings: Dict, version: int = 0) -> None:
+        with self._lock:
+            if version:
+                if version <= self._settings_version:
+                    return
+                self._settings_version = version
+            if settings.get("interval_ms"):
+                self.interval_ms = settings["interval_ms"]
+            # Windows are published as wall-clock end times, an expired one is left to finish
+            remaining = settings.get("window_until", 0.0) - time.time()
+            if remaining > 0:
+                if not self._window_until:
+                    self._window_started = time.time()
+                    self._window_counts = Counter()
+                self._window_until = time.monotonic() + remaining
+            if "slow_threshold_ms" in settings:
+                self._slow_threshold_ms = settings["slow_threshold_ms"]
+                if self._slow_threshold_ms is None:
+                    self._clear_samples()
+            if remaining > 0 or self._slow_threshold_ms is not None:
+                self._ensure_running()
+
+    def status(self) -> Dict:
+        if self.shared is not None:
+            self._sync()
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "active": self.active,
+                "interval_ms": self.interval_ms,
+                "window_remaining_seconds": round(max(0.0, self._window_until - time.monotonic()), 1)
+                if self._window_until else 0.0,
+                "slow_request_threshold_ms": self._slow_threshold_ms,
+                "buffered_samples": len(self._samples),
+            }
+
+    def _ensure_running(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    # Sampling
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                # Slow capture only needs the threads of tracked requests
+                wanted = None if self._window_until else set(self._tracked)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                (thread_id, f"{names.get(thread_id, thread_id)};{_collapse(frame)}")
+                for thread_id, frame in sys._current_frames().items()
+                if thread_id != own_id and (wanted is None or thread_id in wanted)
+            ]
+
+            finished_window = None
+            with self._lock:
+                if self._window_until:
+                    self._window_counts.update(stack for _, stack in stacks)
+                    if started >= self._window_until:
+                        finished_window = (self._window_started, self._window_counts)
+                        self._window_until = 0.0
+                        self._window_counts = Counter()
+                if self._slow_threshold_ms is not None:
+                    self._buffer_samples(started, stacks)
+                    while self._samples and self._samples[0][0] < started - self.history_seconds:
+                        self._samples.popleft()
+                    if not self._samples:
+                        self._clear_samples()
+                stop = not self._window_until and self._slow_threshold_ms is None
+                if stop:
+                    self._thread = None
+                interval = self.interval_ms / 1000
+
+            if finished_window is not None:
+                window_started, counts = finished_window
+                self._write_capture("window", counts, {
+                    "kind": "window",
+                    "started": window_started,
+                    "duration_seconds": round(time.time() - window_started, 2),
+                })
+            if stop:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def _buffer_samples(self, at: float, stacks: List) -> None:
+        # Called with the lock held
+        for thread_id, stack in stacks:
+            records = self._tracked.get(thread_id)
+            if not records:
+                continue
+            stack_id = self._stack_ids.get(stack)
+            if stack_id is None:
+                stack_id = self._stack_ids[stack] = len(self._stacks)
+                self._stacks.append(stack)
+            self._samples.append((at, records[-1], stack_id))
+        while len(self._samples) > self.max_samples:
+            self._samples.popleft()
+
+    def _clear_samples(self) -> None:
+        # Called with the lock held; the stack table is rebuilt from scratch once nothing refers to it
+        self._samples.clear()
+        self._stack_ids = {}
+        self._stacks = []
+
+    # Request tracking
+
+    @contextmanager
+    def request(self, name: str, sample_thread: bool = True):
+        """
+        Track a request in the current context so slow ones can be captured.
+
+        With ``sample_thread`` False the current thread is timed but not sampled,
+        e.g. an event loop thread that also serves other requests; threads join
+        the request's samples through ``attach`` or ``bind``.
+        """
+        if self.shared is not None and time.monotonic() >= self._next_sync:
+            self._sync()
+        if self._slow_threshold_ms is None:
+            yield None
+            return
+
+        record = _RequestRecord(name)
+        token = _current_record.set(record)
+        if sample_thread:
+            self._track(record.thread_id, record, True)
+        else:
+            record.thread_ids.discard(record.thread_id)
+        try:
+            yield record
+        finally:
+            record.ended = time.monotonic()
+            if sample_thread:
+                self._track(record.thread_id, record, False)
+            _current_record.reset(token)
+            threshold = self._slow_threshold_ms
+            if threshold is not None and record.duration_ms >= threshold:
+                self._capture_request(record)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of the request tracked in this context; a no-op otherwise."""
+        record = _current_record.get()
+        if record is None:
+            yield
+            return
+        thread = threading.current_thread()
+        record.thread_ids.add(thread.ident)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage = {"stage": name, "ms": round(1000 * (time.perf_counter() - started), 2)}
+            if thread.ident != record.thread_id:
+                stage["thread"] = thread.name
+            # list.append is atomic, so parallel stages from pool threads need no lock
+            record.stages.append(stage)
+
+    def _track(self, thread_id: int, record: _RequestRecord, working: bool) -> None:
+        with self._lock:
+            records = self._tracked.setdefault(thread_id, [])
+            if working:
+                records.append(record)
+            else:
+                records.remove(record)
+                if not records:
+                    del self._tracked[thread_id]
+
+    @contextmanager
+    def attach(self):
+        """Count the current thread as working on the tracked request until the block ends."""
+        record = _current_record.get()
+        if record is None:
+            yield
+            return
+        thread_id = threading.get_ident()
+        record.thread_ids.add(thread_id)
+        self._track(thread_id, record, True)
+        try:
+            yield
+        finally:
+            self._track(thread_id, record, False)
+
+    def bind(self, func: Callable) -> Callable:
+        """
+        Attach ``func`` to the request tracked in the calling context.
+
+        Thread pools do not inherit context variables, so work submitted to a
+        pool is wrapped with this to keep its stages in the request's timings.
+        The wrapper may run several times concurrently, e.g. from ``pool.map``.
+        """
+        record = _current_record.get()
+        if record is None:
+            return func
+
+        def run(*args, **kwargs):
+            token = _current_record.set(record)
+            try:
+                with self.attach():
+                    return func(*args, **kwargs)
+            finally:
+                _current_record.reset(token)
+        return run
+
+    def _capture_request(self, record: _RequestRecord) -> None:
+        with self._lock:
+            # Only samples taken while a thread was working on this request
+            counts = Counter(self._stacks[stack_id] for at, sample_record, stack_id in self._samples
+                             if sample_record is record)
+        self._write_capture(record.name, counts, {
+            "kind": "slow_request",
+            "request": record.name,
+            "started": record.wall_started,
+            "duration_ms": round(record.duration_ms, 2),
+            "threads": len(record.thread_ids),
+            "stages": record.stages,
+        })
+
+    # Storage
+
+    def _write_capture(self, label: str, counts: Counter, metadata: Dict) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            self._capture_seq += 1
+            # Workers share the output directory, so the pid keeps their ids apart
+            capture_id = (f"{int(time.time())}-{os.getpid()}-{self._capture_seq}-"
+                          f"{re.sub(r'[^a-zA-Z0-9]+', '-', label).strip('-')}")
+        metadata = dict(metadata, id=capture_id, pid=os.getpid(), interval_ms=self.interval_ms,
+                        samples=sum(counts.values()))
+
+        with open(os.path.join(self.output_dir, capture_id + ".collapsed"), "w") as f:
+            for stack, count in counts.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(self.output_dir, capture_id + ".json"), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        for old in self.list_captures()[self.max_captures:]:
+            for ext in (".collapsed", ".json"):
+                try:
+                    os.remove(os.path.join(self.output_dir, old["id"] + ext))
+                except OSError:
+                    pass
+        return capture_id
+
+    def list_captures(self) -> List[Dict]:
+        """Stored captures, newest first."""
+        if not os.path.isdir(self.output_dir):
+            return []
+        captures = []
+        for name in os.listdir(self.output_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.output_dir, name)) as f:
+                    captures.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(captures, key=lambda capture: capture.get("started", 0), reverse=True)
+
+    def capture_path(self, capture_id: str, kind: str = "collapsed") -> Optional[str]:
+        if not re.fullmatch(r"[a-zA-Z0-9-]+", capture_id) or kind not in ("collapsed", "json"):
+            return None
+        path = os.path.join(self.output_dir, f"{capture_id}.{kind}")
+        return path if os.path.exists(path) else None
+
+
+# Process-wide profiler; costs a context variable lookup per stage while no capture is running
+profiler = SamplingProfiler(shared=get_shared_state())
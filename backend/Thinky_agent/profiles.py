@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .schedule_validator import time_to_minutes
+
+
+class SchedulingPreferences:
+    """
+    Scheduling preferences normalized and validated once, when the profile is stored.
+
+    Holds the normalized "HH:MM" dictionary the agents put in their prompts.
+    """
+
+    __slots__ = ("_normalized",)
+
+    def __init__(self, normalized: Dict):
+        self._normalized = normalized
+        work_start = self._minutes(normalized, "work_start_time")
+        work_end = self._minutes(normalized, "work_end_time")
+        for key in ("preferred_break_duration", "exercise_duration", "mindfulness_duration"):
+            self._duration(normalized, key)
+
+        meal_times = normalized.get("preferred_meal_times") or {}
+        if not isinstance(meal_times, dict):
+            raise ValueError("preferred_meal_times must be an object of meal name to time")
+        for meal in meal_times:
+            self._minutes(meal_times, meal)
+
+        if work_start is not None and work_end is not None and work_end <= work_start:
+            raise ValueError("work_end_time must be later than work_start_time")
+
+    @staticmethod
+    def _minutes(values: Dict, key: str) -> Optional[int]:
+        if values.get(key) is None:
+            return None
+        minutes = time_to_minutes(values[key])
+        if minutes is None:
+            raise ValueError(f"Invalid time for {key}: {values[key]!r}")
+        return minutes
+
+    @staticmethod
+    def _duration(values: Dict, key: str) -> Optional[int]:
+        if values.get(key) is None:
+            return None
+        try:
+            minutes = int(values[key])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid duration for {key}: {values[key]!r}")
+        if minutes < 0:
+            raise ValueError(f"{key} must not be negative")
+        return minutes
+
+    def as_dict(self) -> Dict:
+        """Copy of the normalized preferences that callers may modify freely."""
+        normalized = dict(self._normalized)
+        if isinstance(normalized.get("preferred_meal_times"), dict):
+            normalized["preferred_meal_times"] = dict(normalized["preferred_meal_times"])
+        return normalized
+
+
+class UserProfile:
+    __slots__ = ("profile_id", "preferences", "daily_goals", "medical_conditions",
+                 "dietary_preferences", "allergies", "nutrition_goals", "updated_at")
+
+    def __init__(self,
+                 profile_id: str,
+                 preferences: SchedulingPreferences,
+                 daily_goals: Tuple[str, ...] = (),
+                 medical_conditions: Tuple[str, ...] = (),
+                 dietary_preferences: Tuple[str, ...] = (),
+                 allergies: Tuple[str, ...] = (),
+                 nutrition_goals: Optional[str] = None,
+                 updated_at: Optional[float] = None):
+        self.profile_id = profile_id
+        self.preferences = preferences
+        self.daily_goals = daily_goals
+        self.medical_conditions = medical_conditions
+        self.dietary_preferences = dietary_preferences
+        self.allergies = allergies
+        self.nutrition_goals = nutrition_goals
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def to_dict(self) -> Dict:
+        return {
+            "profile_id": self.profile_id,
+            "preferences": self.preferences.as_dict(),
+            "daily_goals": list(self.daily_goals),
+            "medical_conditions": list(self.medical_conditions),
+            "dietary_preferences": list(self.dietary_preferences),
+            "allergies": list(self.allergies),
+            "nutrition_goals": self.nutrition_goals,
+            "updated_at": self.updated_at,
+        }
+
+
+def _string_tuple(values: Optional[List[str]], field: str) -> Tuple[str, ...]:
+    if values is None:
+        return ()
+    if not isinstance(values, (list, tuple)):
+        raise ValueError(f"{field} must be a list of strings")
+    # Drop blanks and duplicates, keeping the client's order
+    return tuple(dict.fromkeys(str(value).strip() for value in values if str(value).strip()))
+
+
+class ProfileStore:
+    """
+    Locally persisted user profiles, referenced by id from the agent endpoints.
+
+    Preferences are normalized and validated when a profile is written, so
+    requests that reference a profile skip that work entirely. Profiles are
+    stored as one JSON file each and kept in a bounded LRU once loaded. Cached
+    entries are checked against the file, so a write made by another worker
+    process is picked up on the next read. With a ``shared`` store the lookup
+    counts are also kept node-wide.
+    """
+
+    def __init__(self,
+                 normalize_preferences: Callable[[Optional[Dict]], Dict],
+                 data_dir: Optional[str] = None,
+                 max_cached: int = 10000,
+                 shared=None):
+        self.normalize_preferences = normalize_preferences
+        self.data_dir = data_dir or os.path.join(os.getenv("THINKY_DATA_DIR", "data"), "user_profiles")
+        self.max_cached = max_cached
+        self.shared = shared
+        self._profiles: "OrderedDict[str, Tuple[UserProfile, Tuple[int, int]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.misses = 0
+        os.makedirs(self.data_dir, exist_ok=True)
+
+    def _path(self, profile_id: str) -> str:
+        # Hash the id so arbitrary profile ids map to safe file names
+        return os.path.join(self.data_dir, hashlib.sha1(profile_id.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _version(path: str) -> Optional[Tuple[int, int]]:
+        # Every write replaces the file, so the inode changes even within one mtime tick
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _cache(self, profile: UserProfile, version: Tuple[int, int]) -> None:
+        self._profiles[profile.profile_id] = (profile, version)
+        self._profiles.move_to_end(profile.profile_id)
+        while len(self._profiles) > self.max_cached:
+            self._profiles.popitem(last=False)
+
+    def compile(self, profile_id: str, data: Dict, updated_at: Optional[float] = None) -> UserProfile:
+        """
+        Normalize and validate raw profile data.
+
+        Args:
+            profile_id: Identifier of the profile
+            data: Profile fields: preferences, daily_goals, medical_conditions,
+                dietary_preferences, allergies and nutrition_goals
+            updated_at: Unix time of the last write, defaults to now
+
+        Returns:
+            The compiled profile
+
+        Raises:
+            ValueError: If a field has an invalid value
+        """
+        preferences = data.get("preferences")
+        if preferences is not None and not isinstance(preferences, dict):
+            raise ValueError("preferences must be an object")
+        try:
+            normalized = self.normalize_preferences(preferences)
+        except (AttributeError, TypeError) as e:
+            raise ValueError(f"Invalid preferences: {e}")
+
+        nutrition_goals = data.get("nutrition_goals")
+        return UserProfile(
+            profile_id=profile_id,
+            preferences=SchedulingPreferences(normalized),
+            daily_goals=_string_tuple(data.get("daily_goals"), "daily_goals"),
+            medical_conditions=_string_tuple(data.get("medical_conditions"), "medical_conditions"),
+            dietary_preferences=_string_tuple(data.get("dietary_preferences"), "dietary_preferences"),
+            allergies=_string_tuple(data.get("allergies"), "allergies"),
+            nutrition_goals=str(nutrition_goals) if nutrition_goals else None,
+            updated_at=updated_at,
+        )
+
+    def put(self, profile_id: str, data: Dict, create: bool = True) -> Optional[UserProfile]:
+        """
+        Create or replace a profile and persist it.
+
+        Args:
+            profile_id: Identifier of the profile
+            data: Profile fields, see compile
+            create: If False, only replace an existing profile
+
+        Returns:
+            The stored profile, or None if ``create`` is False and the profile does not exist
+
+        Raises:
+            ValueError: If a field has an invalid value
+        """
+        profile = self.compile(profile_id, data)
+        path = self._path(profile_id)
+        with self._lock:
+            if not create and self._version(path) is None:
+                return None
+            # Write to a temporary file first so a crash never leaves a partial profile
+            with open(path + ".tmp", "w") as f:
+                json.dump(profile.to_dict(), f)
+            os.replace(path + ".tmp", path)
+            self._cache(profile, self._version(path))
+        return profile
+
+    def get(self, profile_id: str) -> Optional[UserProfile]:
+        with self._lock:
+            path = self._path(profile_id)
+            version = self._version(path)
+            if version is None:
+                self._profiles.pop(profile_id, None)
+                self._count("misses")
+                return None
+
+            cached = self._profiles.get(profile_id)
+            if cached is not None and cached[1] == version:
+                self._profiles.move_to_end(profile_id)
+                self._count("hits")
+                return cached[0]
+
+            try:
+                with open(path) as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                self._count("misses")
+                return None
+            try:
+                profile = self.compile(profile_id, stored, stored.get("updated_at"))
+            except ValueError as e:
+                print(f"Warning: ignoring invalid stored profile {profile_id!r}: {e}")
+                self._count("misses")
+                return None
+            self._count("loads")
+            self._cache(profile, version)
+            return profile
+
+    def _count(self, name: str) -> None:
+        # Called with the lock held
+        setattr(self, name, getattr(self, name) + 1)
+        if self.shared is not None:
+            self.shared.incr("profiles." + name)
+
+    def delete(self, profile_id: str) -> bool:
+        with self._lock:
+            self._profiles.pop(profile_id, None)
+            try:
+                os.remove(self._path(profile_id))
+            except OSError:
+                return False
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.loads + self.misses
+            stats = {
+                "cached_profiles": len(self._profiles),
+                "hits": self.hits,
+                "loads": self.loads,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+        if self.shared is not None:
+            # Node-wide counts across all worker processes
+            counters = self.shared.counters("profiles.")
+            hits = counters.get("hits", 0)
+            lookups = hits + counters.get("loads", 0) + counters.get("misses", 0)
+            stats["all_workers"] = {
+                "hits": hits,
+                "loads": counters.get("loads", 0),
+                "misses": counters.get("misses", 0),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+        return stats
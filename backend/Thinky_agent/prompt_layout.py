@@ -0,0 +1,145 @@
+# Prompt layout: every agent prompt is laid out so that the fixed part (the
+# agent's system prompt, then the task instructions and output format) is
+# byte-identical across requests and all per-request data comes last, so
+# provider-side prompt caching can reuse the fixed part. The checks below
+# render the prompts exactly as crewai sends them and report how much of them
+# is actually shared.
+import os
+import json
+from typing import List, Dict
+
+
+def shared_prefix_length(prompts: List[str]) -> int:
+    """Length in characters of the prefix shared by all prompts."""
+    return len(os.path.commonprefix(prompts)) if prompts else 0
+
+
+def render_prompt(agent, task) -> str:
+    """
+    Render the prompt crewai sends for a task: the agent's system prompt followed by the user prompt.
+
+    Args:
+        agent: crewai Agent that executes the task
+        task: crewai Task with its description and expected output
+
+    Returns:
+        The full prompt text
+    """
+    from crewai.utilities.prompts import Prompts
+
+    # Newer crewai releases load the prompt texts globally instead of per agent
+    try:
+        from crewai.utilities.i18n import get_i18n
+        i18n = get_i18n()
+    except ImportError:
+        i18n = agent.i18n
+    # The keyword for tool support changed between crewai releases
+    try:
+        prompts = Prompts(agent=agent, i18n=i18n, has_tools=False, use_system_prompt=True)
+    except TypeError:
+        prompts = Prompts(agent=agent, i18n=i18n, tools=[], use_system_prompt=True)
+    parts = prompts.task_execution()
+    if "system" in parts:
+        template = parts["system"] + "\n" + parts["user"]
+    else:
+        template = parts["prompt"]
+    return template.replace("{input}", task.prompt())
+
+
+def prefix_report(agent_name: str, prompts: List[str], fixed_prefix: str) -> Dict:
+    """
+    Report how much of an agent's rendered prompt is shareable across requests.
+
+    Args:
+        agent_name: Name used in the report
+        prompts: Full prompts rendered for different sample requests
+        fixed_prefix: The instruction block that must fall inside the shared prefix
+
+    Returns:
+        Dictionary with the shared prefix length and whether the fixed block is stable
+    """
+    prefix = shared_prefix_length(prompts)
+    average = sum(len(prompt) for prompt in prompts) / len(prompts) if prompts else 0
+    # The instructions sit after the system prompt; they are only reusable if
+    # nothing that varies per request comes before or inside them
+    offsets = {prompt.find(fixed_prefix) for prompt in prompts}
+    offset = offsets.pop() if len(offsets) == 1 else -1
+    return {
+        "agent": agent_name,
+        "shared_prefix_chars": prefix,
+        # Rough rule of thumb for English text, good enough to compare layouts
+        "approx_shared_prefix_tokens": prefix // 4,
+        "avg_prompt_chars": round(average),
+        "shared_fraction": round(prefix / average, 3) if average else 0.0,
+        "instructions_offset": offset,
+        "prefix_stable": len(prompts) > 1 and offset >= 0 and offset + len(fixed_prefix) <= prefix,
+    }
+
+
+def check_agents() -> List[Dict]:
+    """Render each agent's full prompt for two different sample requests and compare them."""
+    from crewai import Task
+    from .Mood_Analyzer import Mood_Analyzer, MOOD_INSTRUCTIONS, MOOD_EXPECTED_OUTPUT
+    from .Nutritionist import Nutritionist, NUTRITION_INSTRUCTIONS, NUTRITION_EXPECTED_OUTPUT
+    from .Life_Scheduler import Life_Scheduler, SCHEDULE_INSTRUCTIONS, ADJUST_INSTRUCTIONS, SCHEDULE_EXPECTED_OUTPUT
+
+    mood_agent = Mood_Analyzer().Mood_Analyzer_Agent
+    schedule_agent = Life_Scheduler().Life_Scheduler_Agent
+    nutrition_agent = Nutritionist().Nutritionist_Agent
+
+    def render(agent, descriptions: List[str], expected_output: str) -> List[str]:
+        return [render_prompt(agent, Task(description=description, agent=agent, expected_output=expected_output))
+                for description in descriptions]
+
+    moods = [
+        {"Mood tags": ["tired", "craving_sweets"], "Energy": "low", "Cravings": ["chocolate"]},
+        {"Mood tags": ["happy"], "Energy": "High", "Cravings": ["spicy food"]},
+    ]
+    preferences = [
+        {"work_start_time": "09:00", "work_end_time": "17:00"},
+        {"work_start_time": "07:30", "work_end_time": "16:00", "exercise_duration": 45},
+    ]
+    events = [
+        [{"title": "Standup", "start_time": "09:30", "end_time": "09:45", "is_flexible": False}],
+        [],
+    ]
+
+    return [
+        prefix_report(
+            "Mood_Analyzer",
+            render(mood_agent,
+                   [Mood_Analyzer.build_task_description(text) for text in
+                    ["so tired, want chocolate", "Great day, got promoted and want to celebrate"]],
+                   MOOD_EXPECTED_OUTPUT),
+            MOOD_INSTRUCTIONS,
+        ),
+        prefix_report(
+            "Life_Scheduler.create_schedule",
+            render(schedule_agent,
+                   [Life_Scheduler.build_schedule_description(mood, ["Exercise"], event, prefs)
+                    for mood, event, prefs in zip(moods, events, preferences)],
+                   SCHEDULE_EXPECTED_OUTPUT),
+            SCHEDULE_INSTRUCTIONS,
+        ),
+        prefix_report(
+            "Life_Scheduler.adjust_schedule",
+            render(schedule_agent,
+                   [Life_Scheduler.build_adjust_description({"schedule": []}, mood, [], event)
+                    for mood, event in zip(moods, events)],
+                   SCHEDULE_EXPECTED_OUTPUT),
+            ADJUST_INSTRUCTIONS,
+        ),
+        prefix_report(
+            "Nutritionist",
+            render(nutrition_agent,
+                   [Nutritionist.build_task_description(moods[0], ["diabetes"], ["vegan"], [], "stay calm"),
+                    Nutritionist.build_task_description(moods[1], [], [], ["peanuts"], None)],
+                   NUTRITION_EXPECTED_OUTPUT),
+            NUTRITION_INSTRUCTIONS,
+        ),
+    ]
+
+
+if __name__ == '__main__':
+    # Run from the backend directory: python -m Thinky_agent.prompt_layout
+    print(json.dumps(check_agents(), indent=2))
@@ -0,0 +1,476 @@
+import re
+from typing import List, Dict, Optional, Tuple
+
+DAY_MINUTES = 24 * 60
+
+
+def time_to_minutes(time_str) -> Optional[int]:
+    """
+    Convert a 24-hour "HH:MM" string to minutes after midnight.
+
+    Returns:
+        Minutes after midnight, or None if the value cannot be parsed
+    """
+    if not isinstance(time_str, str) or ":" not in time_str:
+        return None
+    try:
+        hrs, mins = time_str.strip().split(":")[:2]
+        hrs, mins = int(hrs), int(mins[:2])
+    except ValueError:
+        return None
+    if not (0 <= hrs <= 24 and 0 <= mins < 60):
+        return None
+    return min(hrs * 60 + mins, DAY_MINUTES)
+
+
+def minutes_to_time(minutes: int) -> str:
+    minutes = max(0, min(int(minutes), DAY_MINUTES - 1))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class _Item:
+    __slots__ = ("entry", "start", "duration", "fixed")
+
+    def __init__(self, entry: Dict, start: int, duration: int, fixed: bool = False):
+        self.entry = entry
+        self.start = start
+        self.duration = duration
+        self.fixed = fixed
+
+    @property
+    def end(self) -> int:
+        return self.start + self.duration
+
+
+def _fixed_intervals(events: Optional[List[Dict]]) -> List[Tuple[int, int, str]]:
+    """Extract (start, end, title) for non-flexible events with parseable times."""
+    intervals = []
+    for event in events or []:
+        if event.get("is_flexible", False):
+            continue
+        start = time_to_minutes(event.get("start_time"))
+        end = time_to_minutes(event.get("end_time"))
+        if start is None or end is None or end <= start:
+            continue
+        intervals.append((start, end, str(event.get("title", "Fixed event"))))
+    return sorted(intervals)
+
+
+def _activity_key(name) -> str:
+    """Activity name folded for comparison: lowercase words without punctuation."""
+    return " ".join(re.findall(r"[a-z0-9']+", str(name).lower()))
+
+
+def _mentions(item: "_Item", title: str) -> bool:
+    return title.lower() in str(item.entry.get("activity", "")).lower()
+
+
+def _represents_container(items: List["_Item"], start: int, end: int, title: str) -> bool:
+    """Whether a long fixed block such as an office day is covered by entries split up inside it."""
+    return any(item.start >= start and item.end <= end and _mentions(item, title) for item in items)
+
+
+def _parse_duration(entry: Dict) -> Optional[int]:
+    try:
+        return int(float(entry.get("duration_minutes")))
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_schedule(schedule: List[Dict],
+                      fixed_events: Optional[List[Dict]] = None,
+                      preferences: Optional[Dict] = None,
+                      max_blocking_minutes: int = 240) -> List[str]:
+    """
+    Check a generated schedule for structural faults without modifying it.
+
+    Args:
+        schedule: List of schedule entries with "time" and "duration_minutes"
+        fixed_events: Calendar events with normalized "start_time"/"end_time"
+        preferences: User preferences with normalized meal times
+        max_blocking_minutes: Fixed events longer than this (e.g. a whole
+            office day) are treated as containers that may hold other entries
+
+    Returns:
+        List of human-readable issues, empty if the schedule is valid
+    """
+    issues = []
+    items = []
+    for index, entry in enumerate(schedule):
+        start = time_to_minutes(entry.get("time"))
+        duration = _parse_duration(entry)
+        if start is None:
+            issues.append(f"Entry {index} has an invalid time: {entry.get('time')!r}")
+            continue
+        if duration is None or duration <= 0:
+            issues.append(f"Entry {index} has a non-positive or missing duration: {entry.get('duration_minutes')!r}")
+            continue
+        items.append(_Item(entry, start, duration))
+
+    if any(a.start > b.start for a, b in zip(items, items[1:])):
+        issues.append("Schedule entries are not sorted by time")
+
+    fixed = _fixed_intervals(fixed_events)
+    pinned = {(start, end) for start, end, _ in fixed}
+    containers = {(start, end) for start, end, _ in fixed if end - start > max_blocking_minutes}
+
+    ordered = sorted(items, key=lambda item: item.start)
+    for prev, curr in zip(ordered, ordered[1:]):
+        if (prev.start, prev.end) in containers or (curr.start, curr.end) in containers:
+            continue
+        if curr.start < prev.end:
+            issues.append(f"'{prev.entry.get('activity')}' overlaps '{curr.entry.get('activity')}' at {minutes_to_time(curr.start)}")
+
+    for start, end, title in fixed:
+        present = any(item.start == start and item.end == end for item in items)
+        if not present and (start, end) in containers:
+            present = _represents_container(items, start, end, title)
+        if not present:
+            issues.append(f"Fixed event '{title}' ({minutes_to_time(start)}-{minutes_to_time(end)}) is missing or moved")
+        if (start, end) in containers:
+            continue
+        for item in items:
+            if (item.start, item.end) in pinned:
+                continue
+            if item.start < end and start < item.end:
+                issues.append(f"'{item.entry.get('activity')}' conflicts with fixed event '{title}'")
+
+    meal_times = (preferences or {}).get("preferred_meal_times") or {}
+    for meal in meal_times:
+        if not any(meal.lower() in str(item.entry.get("activity", "")).lower() for item in items):
+            issues.append(f"No entry found for preferred meal '{meal}'")
+
+    return issues
+
+
+def repair_schedule(schedule: List[Dict],
+                    fixed_events: Optional[List[Dict]] = None,
+                    preferences: Optional[Dict] = None,
+                    max_blocking_minutes: int = 240,
+                    min_gap_minutes: int = 10,
+                    max_break_minutes: int = 60,
+                    min_duration_minutes: int = 5,
+                    match_window_minutes: int = 60) -> Tuple[List[Dict], Dict]:
+    """
+    Deterministically repair common faults in a generated schedule.
+
+    Entries at a fixed calendar event's exact time are pinned to it. For an event
+    with no such entry, the closest entry naming the event within
+    ``match_window_minutes`` of its start is moved back to it, and otherwise the
+    event is inserted. Long events split into several entries inside their time
+    range are left alone. Flexible entries are then sorted and shifted past
+    overlaps and fixed events, entries that no longer fit before midnight are
+    trimmed or dropped, and gaps are filled with breaks or free time. Entries
+    pinned to a fixed event are marked ``"is_flexible": False`` so later local
+    adjustments keep them in place.
+
+    Args:
+        schedule: List of schedule entries with "time" and "duration_minutes"
+        fixed_events: Calendar events with normalized "start_time"/"end_time"
+        preferences: User preferences, used for the default break duration
+        max_blocking_minutes: Fixed events longer than this are treated as
+            containers and do not push flexible entries out
+        min_gap_minutes: Gaps shorter than this are left empty
+        max_break_minutes: Longer gaps are filled with free time instead of a break
+        min_duration_minutes: Entries trimmed below this length are dropped
+        match_window_minutes: How far from a fixed event's start an entry naming
+            the event may be and still be taken for it
+
+    Returns:
+        Tuple of (repaired schedule, report) where the report lists the issues
+        found before repair and the repairs that were applied
+    """
+    preferences = preferences or {}
+    issues = validate_schedule(schedule, fixed_events, preferences, max_blocking_minutes)
+    repairs = []
+    default_duration = int(preferences.get("preferred_break_duration") or 30)
+
+    # Parse entries, repairing missing or negative durations with the default
+    # length, shortened if the next entry starts sooner
+    parsed = []
+    for entry in schedule:
+        start = time_to_minutes(entry.get("time"))
+        if start is None:
+            repairs.append(f"Dropped entry with invalid time: {entry.get('activity')!r}")
+            continue
+        parsed.append([entry, start, _parse_duration(entry)])
+    parsed.sort(key=lambda row: row[1])
+    items = []
+    for index, (entry, start, duration) in enumerate(parsed):
+        if duration is None or duration <= 0:
+            next_start = parsed[index + 1][1] if index + 1 < len(parsed) else None
+            duration = default_duration
+            if next_start is not None and next_start > start:
+                duration = min(next_start - start, default_duration)
+            repairs.append(f"Set duration of '{entry.get('activity')}' to {duration} minutes")
+        items.append(_Item(dict(entry), start, duration))
+
+    # Pin entries already at a fixed event's exact time first, so a looser match
+    # for another event can never take them
+    fixed = _fixed_intervals(fixed_events)
+    unmatched = []
+    for start, end, title in fixed:
+        exact = next((item for item in items if not item.fixed and
+                      item.start == start and item.end == end), None)
+        if exact is not None:
+            exact.fixed = True
+        else:
+            unmatched.append((start, end, title))
+
+    for start, end, title in unmatched:
+        if end - start > max_blocking_minutes and _represents_container(items, start, end, title):
+            # e.g. an office day split into several work blocks
+            continue
+        nearby = [item for item in items if not item.fixed and _mentions(item, title) and
+                  abs(item.start - start) <= match_window_minutes]
+        if nearby and end - start <= max_blocking_minutes:
+            match = min(nearby, key=lambda item: abs(item.start - start))
+            repairs.append(f"Moved '{match.entry.get('activity')}' back to its fixed time {minutes_to_time(start)}")
+        else:
+            match = _Item({"activity": title, "activity_type": "other", "notes": "Fixed calendar event"}, start, end - start)
+            items.append(match)
+            repairs.append(f"Inserted missing fixed event '{title}'")
+        match.start, match.duration, match.fixed = start, end - start, True
+
+    blocking = sorted((item.start, item.end) for item in items
+                      if item.fixed and item.duration <= max_blocking_minutes)
+
+    # Place flexible entries in order, shifting them past overlaps and fixed events
+    placed = [item for item in items if item.fixed]
+    cursor = 0
+    for item in sorted((item for item in items if not item.fixed), key=lambda item: item.start):
+        start = max(item.start, cursor)
+        moved = True
+        while moved:
+            moved = False
+            for block_start, block_end in blocking:
+                if start < block_end and block_start < start + item.duration:
+                    start = block_end
+                    moved = True
+        # Trim the entry if it now runs into the next fixed event or past midnight
+        limit = min([b for b, _ in blocking if b >= start] + [DAY_MINUTES])
+        duration = min(item.duration, limit - start)
+        if duration < min_duration_minutes:
+            repairs.append(f"Dropped '{item.entry.get('activity')}', it no longer fits in the day")
+            continue
+        if start != item.start:
+            repairs.append(f"Shifted '{item.entry.get('activity')}' from {minutes_to_time(item.start)} to {minutes_to_time(start)}")
+        if duration != item.duration:
+            repairs.append(f"Trimmed '{item.entry.get('activity')}' to {duration} minutes")
+        item.start, item.duration = start, duration
+        placed.append(item)
+        cursor = item.end
+
+    placed.sort(key=lambda item: (item.start, -item.duration))
+
+    # Fill gaps between consecutive entries with breaks
+    filled = []
+    reach = None
+    for item in placed:
+        gap = item.start - reach if reach is not None else 0
+        if gap >= min_gap_minutes:
+            is_break = gap <= max_break_minutes
+            filled.append(_Item({
+                "activity": "Break" if is_break else "Free time",
+                "activity_type": "break" if is_break else "other",
+                "notes": "Added to fill a gap in the schedule",
+            }, reach, gap))
+            repairs.append(f"Filled {gap} minute gap at {minutes_to_time(reach)} with {'a break' if is_break else 'free time'}")
+        filled.append(item)
+        reach = item.end if reach is None else max(reach, item.end)
+
+    repaired = []
+    for item in filled:
+        entry = item.entry
+        entry["time"] = minutes_to_time(item.start)
+        entry["duration_minutes"] = item.duration
+        if item.fixed:
+            entry["is_flexible"] = False
+        repaired.append(entry)
+
+    report = {
+        "valid": not issues,
+        "issues": issues,
+        "repairs": repairs,
+    }
+    return repaired, report
+
+
+def reschedule_locally(schedule: List[Dict],
+                       new_events: List[Dict],
+                       completed_activities: Optional[List[str]] = None,
+                       fixed_events: Optional[List[Dict]] = None,
+                       current_time: Optional[str] = None,
+                       max_blocking_minutes: int = 240,
+                       min_duration_minutes: int = 5) -> Tuple[Optional[List[Dict]], List[str]]:
+    """
+    Fit new fixed events into an existing schedule without regenerating it.
+
+    Completed activities that have already started are removed, the new events
+    are inserted at their times and the remaining flexible entries from the
+    first new event onwards are shifted past them. A flexible entry already
+    running when a new event starts is split: the part before the event stays
+    and the rest continues after it. Entries marked
+    ``"is_flexible": False`` or matching one of the original fixed events never
+    move. Breaks absorb shifts by shrinking so later entries move as little as
+    possible.
+
+    Args:
+        schedule: Current list of schedule entries with "time" and "duration_minutes"
+        new_events: Calendar events with normalized "start_time"/"end_time"
+        completed_activities: Names of activities already done; an entry is
+            removed only if its name matches one exactly (ignoring case and
+            punctuation) and it starts before the current time
+        fixed_events: The calendar events the schedule was built from
+        current_time: Current "HH:MM"; defaults to the start of the first new event
+        max_blocking_minutes: New events longer than this are inserted as
+            containers and do not push other entries out
+        min_duration_minutes: Breaks shrunk below this length are removed
+
+    Returns:
+        Tuple of (new schedule, changes). The schedule is None when the entries
+        cannot be fitted locally, in which case changes explains why.
+    """
+    fixed = _fixed_intervals(new_events)
+    if not fixed:
+        return None, ["No fixed events to place"]
+    first_change = min(start for start, _, _ in fixed)
+    now = time_to_minutes(current_time)
+    if now is None:
+        now = first_change
+
+    completed = {_activity_key(activity) for activity in completed_activities or []}
+    original_fixed = _fixed_intervals(fixed_events)
+    changes = []
+    items = []
+    for entry in schedule:
+        start = time_to_minutes(entry.get("time"))
+        duration = _parse_duration(entry)
+        if start is None or duration is None or duration <= 0:
+            return None, [f"Entry {entry.get('activity')!r} has no usable time or duration"]
+        if _activity_key(entry.get("activity", "")) in completed and start < now:
+            changes.append(f"Removed completed '{entry.get('activity')}' at {minutes_to_time(start)}")
+            continue
+        item = _Item(dict(entry), start, duration)
+        item.fixed = entry.get("is_flexible") is False or any(
+            start == event_start and (item.end == event_end or _mentions(item, title))
+            for event_start, event_end, title in original_fixed
+        )
+        items.append(item)
+
+    # Existing fixed entries block like the new events; if a new event lands on one the model must decide
+    blocking = [(item.start, item.end, item.entry.get("activity")) for item in items
+                if item.fixed and item.duration <= max_blocking_minutes]
+    for start, end, title in fixed:
+        clash = next((name for block_start, block_end, name in blocking
+                      if end - start <= max_blocking_minutes and start < block_end and block_start < end), None)
+        if clash is not None:
+            return None, [f"'{title}' conflicts with fixed entry '{clash}'"]
+        items.append(_Item({"activity": title, "activity_type": "other", "notes": "Added calendar event",
+                            "is_flexible": False}, start, end - start, fixed=True))
+        changes.append(f"Added '{title}' at {minutes_to_time(start)}")
+    blocking = [(block_start, block_end) for block_start, block_end, _ in blocking]
+    blocking += [(start, end) for start, end, _ in fixed if end - start <= max_blocking_minutes]
+
+    # Keep the part of an in-progress entry that happens before the event, the rest moves like any other entry
+    for item in [item for item in items if not item.fixed]:
+        interrupt = min(((start, title) for start, end, title in fixed
+                         if end - start <= max_blocking_minutes and item.start < start < item.end), default=None)
+        if interrupt is None:
+            continue
+        split, title = interrupt
+        remainder = item.end - split
+        item.duration = split - item.start
+        changes.append(f"Paused '{item.entry.get('activity')}' at {minutes_to_time(split)} for '{title}'")
+        if item.entry.get("activity_type") != "break" and remainder >= min_duration_minutes:
+            items.append(_Item(dict(item.entry), split, remainder))
+
+    placed = [item for item in items if item.fixed or item.end <= first_change]
+    cursor = 0
+    for item in sorted((item for item in items if not item.fixed and item.end > first_change),
+                       key=lambda item: item.start):
+        start = max(item.start, cursor)
+        moved = True
+        while moved:
+            moved = False
+            for block_start, block_end in blocking:
+                if start < block_end and block_start < start + item.duration:
+                    start = block_end
+                    moved = True
+
+        if item.entry.get("activity_type") == "break" and start > item.start:
+            # Shrink the break instead of pushing everything after it
+            duration = item.end - start
+            if duration < min_duration_minutes:
+                changes.append(f"Removed break at {minutes_to_time(item.start)}")
+                continue
+            changes.append(f"Shortened break at {minutes_to_time(item.start)} to {duration} minutes")
+            item.start, item.duration = start, duration
+            placed.append(item)
+            cursor = item.end
+            continue
+
+        if start + item.duration > DAY_MINUTES:
+            return None, [f"'{item.entry.get('activity')}' no longer fits before midnight"]
+        if start != item.start:
+            changes.append(f"Moved '{item.entry.get('activity')}' from {minutes_to_time(item.start)} to {minutes_to_time(start)}")
+        item.start = start
+        placed.append(item)
+        cursor = item.end
+
+    placed.sort(key=lambda item: (item.start, -item.duration))
+    rescheduled = []
+    for item in placed:
+        item.entry["time"] = minutes_to_time(item.start)
+        item.entry["duration_minutes"] = item.duration
+        rescheduled.append(item.entry)
+    return rescheduled, changes
+
+
+def check_multi_day_consistency(days: List[Dict],
+                                daily_goals: Optional[List[str]] = None,
+                                max_start_drift_minutes: int = 90) -> List[str]:
+    """
+    Cross-day checks for a stitched multi-day schedule.
+
+    Args:
+        days: Per-day results, each with "date", "calendar_events" and "schedule"
+        daily_goals: Goals that should appear on at least one day
+        max_start_drift_minutes: Allowed spread between the earliest and latest
+            start of the day before it is reported as an irregular rhythm
+
+    Returns:
+        List of human-readable issues, empty if the days are consistent
+    """
+    issues = []
+    day_starts = []
+    activities = []
+    for day in days:
+        schedule = day.get("schedule")
+        if not isinstance(schedule, list) or not schedule:
+            issues.append(f"{day.get('date')}: no schedule was generated")
+            continue
+
+        starts = [time_to_minutes(entry.get("time")) for entry in schedule if isinstance(entry, dict)]
+        starts = [start for start in starts if start is not None]
+        if starts:
+            day_starts.append((min(starts), day.get("date")))
+
+        for start, end, title in _fixed_intervals(day.get("calendar_events")):
+            if not any(time_to_minutes(entry.get("time")) == start and
+                       _parse_duration(entry) == end - start for entry in schedule):
+                issues.append(f"{day.get('date')}: fixed event '{title}' is missing or moved")
+
+        activities.extend(str(entry.get("activity", "")).lower() for entry in schedule)
+
+    if day_starts:
+        earliest, latest = min(day_starts), max(day_starts)
+        if latest[0] - earliest[0] > max_start_drift_minutes:
+            issues.append(f"Day start varies from {minutes_to_time(earliest[0])} ({earliest[1]}) "
+                          f"to {minutes_to_time(latest[0])} ({latest[1]})")
+
+    for goal in daily_goals or []:
+        if not any(goal.lower() in activity for activity in activities):
+            issues.append(f"Goal '{goal}' is not scheduled on any day")
+
+    return issues
@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from .shared_state import get_shared_state
+
+# load Configuration
+load_dotenv()
+
+TAVILY_API = os.getenv("TAVILY_API_KEY")
+# Point at a local stand-in server for tests, e.g. http://127.0.0.1:8765
+TAVILY_BASE_URL = os.getenv("TAVILY_BASE_URL", "https://api.tavily.com")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share a cache entry."""
+    return " ".join(query.lower().split())
+
+
+class SearchEnricher:
+    """
+    Tavily search with a pooled HTTP session and a TTL'd, size-bounded result cache.
+
+    Condition and diet queries repeat across most users, so after warm-up nearly
+    every lookup is served from the cache. Uncached queries in a batch are sent
+    concurrently.
+
+    With a ``shared`` store, fetched results are also written to SQLite and a
+    local miss checks there before calling the API, so each query is fetched
+    once per node rather than once per worker.
+    """
+
+    def __init__(self,
+                 api_key: Optional[str] = TAVILY_API,
+                 base_url: str = TAVILY_BASE_URL,
+                 max_entries: int = 2048,
+                 ttl_seconds: float = 6 * 60 * 60,
+                 max_workers: int = 8,
+                 max_results: int = 3,
+                 timeout: float = 10.0,
+                 shared=None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self.timeout = timeout
+        self.shared = shared
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            item = self._cache.get(key)
+            if item is not None:
+                stored_at, results = item
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._cache.move_to_end(key)
+                    return results
+                del self._cache[key]
+        if self.shared is None:
+            return None
+        # Fetched by another worker; keep a local copy
+        results = self.shared.get_search_results(key, self.ttl_seconds)
+        if results is not None:
+            self._remember(key, results)
+        return results
+
+    def _remember(self, key: str, results: List[Dict]) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic(), results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _store(self, key: str, results: List[Dict]) -> None:
+        self._remember(key, results)
+        if self.shared is not None:
+            self.shared.put_search_results(key, results, self.ttl_seconds)
+
+    def _fetch(self, query: str) -> Optional[List[Dict]]:
+        try:
+            response = self.session.post(
+                f"{self.base_url}/search",
+                json={"query": query, "max_results": self.max_results, "search_depth": "basic"},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            print(f"WARNING: Search failed for '{query}': {e}")
+            return None
+
+        return [
+            {
+                "title": item.get("title", ""),
+                "url": item.get("url", ""),
+                "content": (item.get("content") or "")[:500],
+            }
+            for item in data.get("results", [])[:self.max_results]
+        ]
+
+    def search_many(self, queries: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Look up several queries, serving cached ones directly and fetching the rest concurrently.
+
+        Args:
+            queries: Free-text search queries
+
+        Returns:
+            Dictionary mapping each query to its (possibly empty) list of results
+        """
+        results = {}
+        pending = {}
+        for query in queries:
+            key = normalize_query(query)
+            if not key:
+                continue
+            cached = self._cached(key)
+            if cached is not None:
+                results[query] = cached
+                with self._lock:
+                    self.hits += 1
+                if self.shared is not None:
+                    self.shared.incr("search.hits")
+            else:
+                pending.setdefault(key, []).append(query)
+
+        if pending:
+            with self._lock:
+                self.misses += len(pending)
+            if self.shared is not None:
+                self.shared.incr("search.misses", len(pending))
+            futures = {key: self._pool.submit(self._fetch, key) for key in pending}
+            for key, future in futures.items():
+                fetched = future.result()
+                if fetched is not None:
+                    # Failed lookups are not cached so they are retried next time
+                    self._store(key, fetched)
+                for query in pending[key]:
+                    results[query] = fetched or []
+
+        return results
+
+    def enrichment_text(self, queries: List[str], max_chars: int = 2000) -> str:
+        """Compact text block of search snippets to include in an agent prompt."""
+        lines = []
+        for query, items in self.search_many(queries).items():
+            for item in items:
+                lines.append(f"- [{query}] {item['title']}: {item['content']}")
+        return "\n".join(lines)[:max_chars]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+        if self.shared is not None:
+            # Node-wide counts across all worker processes
+            counters = self.shared.counters("search.")
+            stats["all_workers"] = {"hits": counters.get("hits", 0), "misses": counters.get("misses", 0)}
+        return stats
+
+
+_shared_enricher = None
+_shared_lock = threading.Lock()
+
+
+def get_search_enricher() -> SearchEnricher:
+    """Process-wide enricher so all agents share one connection pool and cache."""
+    global _shared_enricher
+    with _shared_lock:
+        if _shared_enricher is None:
+            _shared_enricher = SearchEnricher(shared=get_shared_state())
+        return _shared_enricher
@@ -0,0 +1,175 @@
+import time
+import zlib
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .mood_lexicon import FILLER_WORDS, is_negator, moods_in, scoped_tokens
+
+# Common paraphrases in mood texts folded onto one token
+_SYNONYMS = {
+    "want": "crave", "wanting": "crave", "wanna": "crave", "craving": "crave", "cravings": "crave",
+    "exhausted": "tired", "sleepy": "tired", "drained": "tired", "worn": "tired",
+    "stressed": "stress", "stressful": "stress", "worried": "anxious", "nervous": "anxious",
+    "glad": "happy", "joyful": "happy", "down": "sad", "unhappy": "sad",
+}
+# Length of the detected-mood part of an embedding relative to the word part.
+# At 1.5, two texts with identical wording but one different mood ("... feeling
+# sad" / "... feeling happy") score about 0.3, however long the shared context
+# is, or about 0.65 if they also share a second mood such as a craving.
+_MOOD_WEIGHT = 1.5
+
+
+def _features(tokens: List[Tuple[str, bool]]) -> List[str]:
+    """Content words with synonyms folded; words in a negation's scope are prefixed with "!"."""
+    words = []
+    for token, negated in tokens:
+        if not token[0].isalnum() or token in FILLER_WORDS or is_negator(token):
+            continue
+        word = _SYNONYMS.get(token, token)
+        words.append("!" + word if negated else word)
+    return words
+
+
+def embed_text(text: str, dim: int = 512) -> np.ndarray:
+    """
+    Embed text locally as an L2-normalized hashed bag of words and character n-grams.
+
+    Word features capture shared vocabulary while 3/4-grams inside each word let
+    inflections and near-spellings ("craving"/"crave", "tired"/"tiredness") overlap.
+    Negated words ("not tired") get only a distinct, heavier word feature and no
+    n-grams, so they never look like their positive form. Moods found through the
+    mood lexicon get features scaled to the length of the word part, so the mood
+    named in a text counts as much as all the context around it.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    tokens = scoped_tokens(text)
+    for word in _features(tokens):
+        if word.startswith("!"):
+            vector[zlib.crc32(b"w:" + word.encode("utf-8")) % dim] += 4.0
+            continue
+        vector[zlib.crc32(b"w:" + word.encode("utf-8")) % dim] += 2.0
+        padded = f"<{word}>"
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                vector[zlib.crc32(padded[i:i + n].encode("utf-8")) % dim] += 1.0
+    moods = moods_in(tokens)
+    if moods:
+        weight = _MOOD_WEIGHT * (float(np.linalg.norm(vector)) or 1.0) / len(moods) ** 0.5
+        for mood in moods:
+            vector[zlib.crc32(b"m:" + mood.encode("utf-8")) % dim] += weight
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """
+    Bounded near-duplicate cache keyed by text similarity.
+
+    Vectors live in a preallocated NumPy matrix used as a ring buffer, so a
+    lookup is a single matrix-vector product and the oldest entry is overwritten
+    once the cache is full.
+
+    With a ``shared`` store, entries are written to SQLite and every worker
+    process pulls new ones into its own matrix before a lookup, so an analysis
+    made by one worker is reused by all of them.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 4096, dim: int = 512, shared=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.dim = dim
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._values = [None] * max_entries
+        self._size = 0
+        self._next = 0
+        self.shared = shared
+        self._shared_seen = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._lookup_times = deque(maxlen=1024)
+
+    def lookup(self, text: str) -> Optional[Any]:
+        """
+        Return the cached value for the most similar stored text, if similar enough.
+
+        Args:
+            text: Query text
+
+        Returns:
+            The cached value, or None if no entry reaches the similarity threshold
+        """
+        start = time.perf_counter()
+        vector = embed_text(text, self.dim)
+        with self._lock:
+            if self.shared is not None:
+                self._sync()
+            value = None
+            if self._size:
+                similarities = self._vectors[:self._size] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    value = self._values[best]
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._lookup_times.append(time.perf_counter() - start)
+        if self.shared is not None:
+            self.shared.incr("semantic_cache.misses" if value is None else "semantic_cache.hits")
+        return value
+
+    def store(self, text: str, value: Any) -> None:
+        vector = embed_text(text, self.dim)
+        if not vector.any():
+            return
+        if self.shared is not None:
+            self.shared.append_semantic_entry(vector.astype(np.float32).tobytes(), value, self.max_entries)
+            with self._lock:
+                self._sync()
+            return
+        with self._lock:
+            self._insert(vector, value)
+
+    def _insert(self, vector: np.ndarray, value: Any) -> None:
+        self._vectors[self._next] = vector
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.max_entries
+        self._size = min(self._size + 1, self.max_entries)
+
+    def _sync(self) -> None:
+        # Pull entries stored by other workers since the last sync; the lock is held
+        for row_id, raw, value in self.shared.semantic_entries_since(self._shared_seen, self.max_entries):
+            vector = np.frombuffer(raw, dtype=np.float32)
+            if vector.shape == (self.dim,):
+                self._insert(vector, value)
+            self._shared_seen = row_id
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            times = sorted(self._lookup_times)
+            stats = {
+                "entries": self._size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "avg_lookup_ms": round(1000 * sum(times) / len(times), 3) if times else 0.0,
+                "p95_lookup_ms": round(1000 * times[min(len(times) - 1, int(0.95 * len(times)))], 3) if times else 0.0,
+            }
+        if self.shared is not None:
+            # Node-wide counts across all worker processes
+            counters = self.shared.counters("semantic_cache.")
+            hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+            stats["all_workers"] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        return stats
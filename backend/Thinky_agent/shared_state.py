@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    client_id TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE TABLE IF NOT EXISTS semantic_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    vector BLOB NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_cache (
+    key TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    stored REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class SharedStateStore:
+    """
+    SQLite-backed state shared by all worker processes on a node.
+
+    Holds the per-client rate-limit buckets, idempotency records, semantic and
+    search cache entries, counters and runtime settings that would otherwise be
+    private to each worker. The
+    database runs in WAL mode so readers never block the single writer, and
+    every read-modify-write happens in one IMMEDIATE transaction. Connections
+    are opened lazily per process and thread, so a store created before the
+    server forks is safe to use in the workers.
+    """
+
+    def __init__(self, path: Optional[str] = None, busy_timeout: float = 10.0, prune_every: int = 1000):
+        data_dir = os.getenv("THINKY_DATA_DIR", "data")
+        self.path = path or os.path.join(data_dir, "shared_state.db")
+        self.busy_timeout = busy_timeout
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=busy_timeout)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # Never reuse a connection inherited across fork
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # Rate limiting
+
+    def take_token(self, client_id: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        Token bucket shared across processes, same semantics as admission.TokenBucket.
+
+        Returns:
+            Tuple of (allowed, seconds until enough tokens would be available)
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE client_id = ?",
+                               (client_id,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO rate_buckets (client_id, tokens, updated) VALUES (?, ?, ?)",
+                         (client_id, tokens, now))
+            if self._due_for_pruning() and rate > 0:
+                # Buckets idle long enough to have refilled are equivalent to new ones
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - capacity / rate,))
+        if allowed:
+            return True, 0.0
+        return False, (cost - tokens) / rate if rate > 0 else float("inf")
+
+    # Idempotency
+
+    def claim_idempotency(self,
+                          scope: str,
+                          key: str,
+                          fingerprint: str,
+                          ttl_seconds: float,
+                          stale_seconds: float) -> Tuple[str, Any]:
+        """
+        Try to become the process that executes the request for this key.
+
+        Returns:
+            ("owner", None) if the caller should run the request, ("done", result)
+            for a stored response, ("running", None) while another worker runs
+            it, or ("conflict", None) if the key was used with another body
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT fingerprint, done, result, created FROM idempotency WHERE scope = ? AND key = ?",
+                               (scope, key)).fetchone()
+            if row is not None:
+                stored_fingerprint, done, result, created = row
+                expired = done and now - created > ttl_seconds
+                # A worker that died mid-request leaves a record that is never completed
+                abandoned = not done and now - created > stale_seconds
+                if not expired and not abandoned:
+                    if stored_fingerprint != fingerprint:
+                        return "conflict", None
+                    if done:
+                        return "done", json.loads(result)
+                    return "running", None
+            conn.execute("INSERT OR REPLACE INTO idempotency (scope, key, fingerprint, done, result, created) "
+                         "VALUES (?, ?, ?, 0, NULL, ?)", (scope, key, fingerprint, now))
+            if self._due_for_pruning():
+                conn.execute("DELETE FROM idempotency WHERE done = 1 AND created < ?", (now - ttl_seconds,))
+        return "owner", None
+
+    def complete_idempotency(self, scope: str, key: str, result: Any) -> None:
+        self._conn().execute("UPDATE idempotency SET done = 1, result = ?, created = ? WHERE scope = ? AND key = ?",
+                             (json.dumps(result, default=str), time.time(), scope, key))
+
+    def abandon_idempotency(self, scope: str, key: str) -> None:
+        self._conn().execute("DELETE FROM idempotency WHERE scope = ? AND key = ? AND done = 0", (scope, key))
+
+    # Semantic cache
+
+    def append_semantic_entry(self, vector: bytes, value: Any, max_entries: int) -> None:
+        with self._transaction() as conn:
+            row_id = conn.execute("INSERT INTO semantic_cache (vector, value) VALUES (?, ?)",
+                                  (vector, json.dumps(value, default=str))).lastrowid
+            if self._due_for_pruning():
+                conn.execute("DELETE FROM semantic_cache WHERE id <= ?", (row_id - max_entries,))
+
+    def semantic_entries_since(self, last_id: int, limit: int) -> List[Tuple[int, bytes, Any]]:
+        """Entries added after ``last_id``, oldest first, at most the newest ``limit``."""
+        rows = self._conn().execute(
+            "SELECT id, vector, value FROM semantic_cache WHERE id > ? ORDER BY id DESC LIMIT ?",
+            (last_id, limit)
+        ).fetchall()
+        return [(row_id, vector, json.loads(value)) for row_id, vector, value in reversed(rows)]
+
+    # Search cache
+
+    def get_search_results(self, key: str, ttl_seconds: float) -> Optional[List[Dict]]:
+        row = self._conn().execute("SELECT results, stored FROM search_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put_search_results(self, key: str, results: List[Dict], ttl_seconds: float) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO search_cache (key, results, stored) VALUES (?, ?, ?)",
+                         (key, json.dumps(results), now))
+            if self._due_for_pruning():
+                conn.execute("DELETE FROM search_cache WHERE stored < ?", (now - ttl_seconds,))
+
+    # Settings
+
+    def get_setting(self, name: str) -> Optional[Tuple[int, Dict]]:
+        """Current value of a setting and its version, which grows with every change."""
+        row = self._conn().execute("SELECT version, value FROM settings WHERE name = ?", (name,)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def merge_setting(self, name: str, changes: Dict) -> Tuple[int, Dict]:
+        """Update some keys of a setting atomically and return the new version and value."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT version, value FROM settings WHERE name = ?", (name,)).fetchone()
+            version, value = (0, {}) if row is None else (row[0], json.loads(row[1]))
+            value.update(changes)
+            conn.execute("INSERT OR REPLACE INTO settings (name, value, version) VALUES (?, ?, ?)",
+                         (name, json.dumps(value), version + 1))
+        return version + 1, value
+
+    # Counters
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self._conn().execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                             "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def counters(self, prefix: str = "") -> Dict[str, int]:
+        rows = self._conn().execute("SELECT name, value FROM counters WHERE name LIKE ? ESCAPE '\\'",
+                                    (prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",))
+        return {name[len(prefix):]: value for name, value in rows}
+
+    def _due_for_pruning(self) -> bool:
+        self._writes += 1
+        return self._writes % self.prune_every == 0
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_state() -> Optional[SharedStateStore]:
+    """
+    Process-wide shared store, or None when running as a single process.
+
+    Enabled by THINKY_SHARED_STATE=1, which the multi-worker server
+    configuration sets before the app is imported.
+    """
+    global _shared_store
+    if os.getenv("THINKY_SHARED_STATE", "0") != "1":
+        return None
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = SharedStateStore(os.getenv("THINKY_SHARED_STATE_PATH"))
+        return _shared_store
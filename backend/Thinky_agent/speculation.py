@@ -0,0 +1,143 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .profiler import profiler
+from .mood_lexicon import MOOD_KEYWORDS, detect_moods
+
+_LOW_ENERGY = {"tired", "sad", "bored"}
+_HIGH_ENERGY = {"excited", "celebratory", "angry", "happy"}
+
+
+def estimate_mood(text: str) -> Dict:
+    """
+    Classify mood text locally with keyword cues, in the Mood_Analyzer output format.
+
+    This is only a provisional estimate used to start downstream work early; the
+    full analysis always replaces it in the response.
+    """
+    # Whole-word cues only, and "not tired" does not count as tired
+    moods = detect_moods(text)
+    tags = [tag for tag in MOOD_KEYWORDS if tag in moods]
+
+    low = len(_LOW_ENERGY.intersection(tags))
+    high = len(_HIGH_ENERGY.intersection(tags))
+    if low > high:
+        energy = "Low"
+    elif high > low:
+        energy = "High"
+    else:
+        energy = "Medium"
+
+    return {
+        "Mood tags": tags or ["calm"],
+        "Energy": energy,
+        "Cravings": [tag.replace("craving_", "").replace("_", " ") for tag in tags if tag.startswith("craving_")],
+        "confidence score": "Low",
+        "personalized tips": "",
+    }
+
+
+def energy_bucket(mood_data: Optional[Dict]) -> str:
+    if not isinstance(mood_data, dict):
+        return ""
+    energy = str(mood_data.get("Energy", "")).strip().lower()
+    for bucket in ("low", "medium", "high"):
+        if bucket in energy:
+            return bucket
+    return energy
+
+
+class SpeculativeExecutor:
+    """
+    Overlap mood analysis with the work that depends on it.
+
+    Generation starts immediately from a provisional mood (a semantic cache hit
+    or a local estimate) while the full analysis runs on a worker thread. If the
+    final mood lands in the same energy bucket the speculative result is kept,
+    otherwise generation is re-run with the final mood.
+    """
+
+    def __init__(self, max_workers: int = 8, shared=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self.shared = shared
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits = 0
+        self.misses = 0
+        self.cached = 0
+
+    def run(self,
+            mood_text: str,
+            mood_analyzer,
+            generate: Callable[[Dict], Any]) -> Tuple[Dict, Any, Dict]:
+        """
+        Analyze ``mood_text`` and call ``generate`` with the mood, speculatively.
+
+        Args:
+            mood_text: The user's free-text mood description
+            mood_analyzer: Mood_Analyzer instance used for the full analysis
+            generate: Callable producing the dependent result from a mood analysis
+
+        Returns:
+            Tuple of (final mood analysis, generated result, speculation details)
+        """
+        with profiler.stage("mood.semantic_cache"):
+            cached = mood_analyzer.semantic_cache.lookup(mood_text)
+        if cached is not None:
+            # The full analysis is already known, nothing to speculate on
+            with self._lock:
+                self.cached += 1
+            if self.shared is not None:
+                self.shared.incr("speculation.served_from_cache")
+            mood_result = copy.deepcopy(cached)
+            return mood_result, generate(mood_result), {"mode": "cached"}
+
+        provisional = estimate_mood(mood_text)
+        # The cache was just checked, go straight to the model
+        analysis = self._pool.submit(profiler.bind(mood_analyzer.run_analysis), mood_text)
+        speculative = generate(provisional)
+        mood_result = analysis.result()
+
+        hit = energy_bucket(provisional) == energy_bucket(mood_result)
+        with self._lock:
+            self.attempts += 1
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self.shared is not None:
+            self.shared.incr("speculation.hits" if hit else "speculation.misses")
+
+        details = {
+            "mode": "speculative",
+            "provisional_energy": energy_bucket(provisional),
+            "final_energy": energy_bucket(mood_result),
+            "hit": hit,
+        }
+        if hit:
+            return mood_result, speculative, details
+        return mood_result, generate(mood_result), details
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                "attempts": self.attempts,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+                "served_from_cache": self.cached,
+            }
+        if self.shared is not None:
+            # Node-wide counts across all worker processes
+            counters = self.shared.counters("speculation.")
+            hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+            stats["all_workers"] = {
+                "attempts": hits + misses,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "served_from_cache": counters.get("served_from_cache", 0),
+            }
+        return stats
@@ -0,0 +1,166 @@
+"""
+Throughput benchmark for the production server across worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py main:app` with 1, 2, 4, ... workers and
+drives /adjust-schedule on its local fast path (unchanged mood plus a new
+event), which exercises request parsing, admission control, schedule repair
+and JSON encoding without calling the model. Run from the backend directory:
+
+    python benchmark.py --workers 1,2,4,8 --duration 15
+
+The load generator runs in separate processes on the same machine, so leave
+some cores for it or point --clients at a smaller number than the core count.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import http.client
+import multiprocessing
+
+ADJUST_PAYLOAD = {
+    "current_schedule": {
+        "schedule": [
+            {"time": "08:00", "activity": "Breakfast", "duration_minutes": 30},
+            {"time": "09:00", "activity": "Deep work", "duration_minutes": 120, "is_flexible": True},
+            {"time": "12:30", "activity": "Lunch", "duration_minutes": 45},
+            {"time": "14:00", "activity": "Email", "duration_minutes": 60, "is_flexible": True},
+            {"time": "16:00", "activity": "Exercise", "duration_minutes": 30, "is_flexible": True},
+            {"time": "18:30", "activity": "Dinner", "duration_minutes": 45},
+        ]
+    },
+    "completed_activities": ["Breakfast"],
+    "new_events": [{"title": "Team sync", "start_time": "14:00", "end_time": "14:30", "is_flexible": False}],
+    "previous_mood_analysis": {"Mood tags": ["calm"], "Energy": "Medium", "Cravings": []},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        THINKY_WORKERS=str(workers),
+        THINKY_BIND=f"127.0.0.1:{port}",
+        THINKY_DATA_DIR=data_dir,
+        # Measure server capacity, not the per-client rate limit
+        THINKY_CLIENT_RATE="1000000",
+        THINKY_CLIENT_BURST="1000000",
+        THINKY_AGENT_CONCURRENCY="256",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/status")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def client_loop(args) -> tuple:
+    """Send requests over one keep-alive connection until the deadline."""
+    port, deadline = args
+    body = json.dumps(ADJUST_PAYLOAD)
+    headers = {"Content-Type": "application/json"}
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    latencies = []
+    errors = 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request("POST", "/adjust-schedule", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            # Worker recycled or connection dropped; reconnect and carry on
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    return latencies, errors
+
+
+def run_load(port: int, clients: int, duration: float) -> dict:
+    deadline = time.time() + duration
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_loop, [(port, deadline)] * clients)
+
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+
+    def percentile(p: float) -> float:
+        return 1000 * latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(0.50), 2),
+        "p99_ms": round(percentile(0.99), 2),
+    }
+
+
+def main():
+    cores = multiprocessing.cpu_count()
+    default_workers = []
+    count = 1
+    while count <= cores:
+        default_workers.append(count)
+        count *= 2
+
+    parser = argparse.ArgumentParser(description="Thinky multi-worker throughput benchmark")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)),
+                        help="Comma-separated worker counts to test")
+    parser.add_argument("--clients", type=int, default=max(4, cores),
+                        help="Concurrent client processes generating load")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unmeasured load first")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for workers in [int(value) for value in args.workers.split(",")]:
+            port = free_port()
+            server = start_server(workers, port, data_dir)
+            try:
+                run_load(port, args.clients, args.warmup)
+                result = dict(workers=workers, **run_load(port, args.clients, args.duration))
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+            results.append(result)
+            print(json.dumps(result))
+
+    baseline = results[0]["throughput_rps"] if results else 0
+    print(f"\n{'workers':>8} {'req/s':>10} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for result in results:
+        speedup = result["throughput_rps"] / baseline if baseline else 0.0
+        print(f"{result['workers']:>8} {result['throughput_rps']:>10} {speedup:>8.2f} "
+              f"{result['p50_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
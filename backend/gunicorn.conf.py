@@ -0,0 +1,35 @@
+# Production server configuration: gunicorn -c gunicorn.conf.py main:app
+#
+# The app (and the crewai import behind it) is loaded once in the master
+# process and shared copy-on-write by the forked uvicorn workers. Caches,
+# rate limits and idempotency records that must be consistent across workers
+# live in a local SQLite store (Thinky_agent/shared_state.py).
+import os
+import multiprocessing
+
+# Must be set before the app is imported so every component picks up the shared store
+os.environ.setdefault("THINKY_SHARED_STATE", "1")
+# Background telemetry exporter threads do not survive fork
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+bind = os.getenv("THINKY_BIND", "0.0.0.0:8002")
+workers = int(os.getenv("THINKY_WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Recycle workers after a bounded number of requests, staggered by the jitter
+# so they do not all restart together; in-flight requests get graceful_timeout
+max_requests = int(os.getenv("THINKY_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("THINKY_MAX_REQUESTS_JITTER", "200"))
+graceful_timeout = int(os.getenv("THINKY_GRACEFUL_TIMEOUT", "120"))
+# Agent calls are slow, keep this above the longest expected request
+timeout = int(os.getenv("THINKY_WORKER_TIMEOUT", "300"))
+keepalive = 5
+
+accesslog = os.getenv("THINKY_ACCESS_LOG")
+
+
+def when_ready(server):
+    server.log.info("Thinky ready with %s workers, shared state at %s",
+                    workers, os.getenv("THINKY_SHARED_STATE_PATH") or "THINKY_DATA_DIR/shared_state.db")
+
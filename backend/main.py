@@ -1,11 +1,27 @@
+import os
+import uuid
+import anyio
+import hmac
+import math
+from contextlib import contextmanager
+from datetime import datetime
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from fastapi import FastAPI, Query, Response
-from fastapi.responses import PlainTextResponse
+from fastapi import FastAPI, Request, Response, Header, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from Thinky_agent.Nutritionist import Nutritionist
 from Thinky_agent.Mood_Analyzer import Mood_Analyzer
 from Thinky_agent.Life_Scheduler import Life_Scheduler
+from Thinky_agent.idempotency import IdempotencyStore, IdempotencyConflict, IdempotencyInProgress, request_fingerprint
+from Thinky_agent.admission import AdmissionController, AdmissionRejected, RateLimited
+from Thinky_agent.mood_history import MoodHistoryStore
+from Thinky_agent.speculation import SpeculativeExecutor
+from Thinky_agent.day_planner import DayPlanner
+from Thinky_agent.profiler import profiler
+from Thinky_agent.profiles import ProfileStore, UserProfile
+from Thinky_agent.shared_state import get_shared_state
 
 
 app = FastAPI(
@@ -20,28 +36,185 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed", "Retry-After"],
 )
 
 # Agents Initialization
 mood_analyzer = Mood_Analyzer()
 life_scheduler = Life_Scheduler()
 nutritionist = Nutritionist()
+day_planner = DayPlanner(mood_analyzer, life_scheduler, nutritionist)
+
+# Stored user profiles, normalized once at write time and referenced by profile_id
+profile_store = ProfileStore(life_scheduler.normalize_preferences, shared=get_shared_state())
+
+def load_profile(profile_id: Optional[str]) -> Optional[UserProfile]:
+    if profile_id is None:
+        return None
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return profile
+
+def from_profile(value, profile: Optional[UserProfile], field: str):
+    """Value sent with the request, falling back to the stored profile's field."""
+    if value is not None or profile is None:
+        return value
+    stored = getattr(profile, field)
+    return list(stored) if isinstance(stored, tuple) else stored
+
+# Per-user mood history with incrementally maintained trend aggregates
+mood_history = MoodHistoryStore()
+
+def record_mood(profile: Optional[UserProfile], mood_result: Dict) -> None:
+    # Mood history is health-adjacent data, so it is only kept under server-issued profile ids
+    if profile is not None:
+        mood_history.record(profile.profile_id, mood_result)
+
+# Runs schedule generation on a provisional mood while the full mood analysis completes
+speculative_executor = SpeculativeExecutor(shared=get_shared_state())
+SPECULATIVE_DEFAULT = os.getenv("THINKY_SPECULATIVE_EXECUTION", "0") == "1"
+
+def use_speculation(requested: Optional[bool]) -> bool:
+    return SPECULATIVE_DEFAULT if requested is None else requested
+
+# Stored responses for client retries carrying an Idempotency-Key header
+idempotency_store = IdempotencyStore(max_entries=1024, ttl_seconds=24 * 60 * 60, shared=get_shared_state())
+
+def run_idempotent(scope: str, idempotency_key: Optional[str], req: BaseModel,
+                   request: Request, response: Response, handler):
+    try:
+        result, replayed = idempotency_store.run(
+            key=idempotency_key,
+            scope=scope,
+            fingerprint=request_fingerprint(jsonable_encoder(req)),
+            func=handler,
+            client_id=client_identifier(request)
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "5"})
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+# Admission control: per-client token buckets and a weighted queue in front of the agents
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("THINKY_AGENT_CONCURRENCY", "8")),
+    rate_per_second=float(os.getenv("THINKY_CLIENT_RATE", "0.5")),
+    burst=float(os.getenv("THINKY_CLIENT_BURST", "10")),
+    max_queue=int(os.getenv("THINKY_MAX_QUEUE", "256")),
+    queue_timeout=float(os.getenv("THINKY_QUEUE_TIMEOUT", "60")),
+    shared=get_shared_state(),
+)
+
+ENDPOINT_PRIORITY = {
+    "/analyze-mood": "interactive",
+    "/adjust-schedule": "interactive",
+    "/create-schedule": "standard",
+    "/create-multi-day-schedule": "standard",
+    "/create-custom-schedule": "standard",
+    "/plan-day": "standard",
+    "/nutrition-plan": "bulk",
+}
+
+# Reverse proxies whose X-Forwarded-For header is trusted, e.g. "10.0.0.5,10.0.0.6"
+TRUSTED_PROXIES = {ip.strip() for ip in os.getenv("THINKY_TRUSTED_PROXIES", "").split(",") if ip.strip()}
+
+def client_identifier(request: Request) -> str:
+    peer = request.client.host if request.client else "anonymous"
+    if peer not in TRUSTED_PROXIES:
+        # Headers from anyone else are client-controlled and would allow a fresh bucket per request
+        return peer
+    forwarded = [ip.strip() for ip in request.headers.get("X-Forwarded-For", "").split(",") if ip.strip()]
+    # Each trusted proxy appends the address it received from, so the first
+    # untrusted address from the right is the real client
+    for ip in reversed(forwarded):
+        if ip not in TRUSTED_PROXIES:
+            return ip
+    return peer
+
+# Sync endpoints run in anyio's threadpool and block a thread while queued for
+# admission. Size it so every admitted or queued request has a thread, plus
+# headroom for the other sync routes; otherwise requests past its default 40
+# threads wait FIFO in anyio and never reach the weighted queue.
+THREADPOOL_HEADROOM = int(os.getenv("THINKY_THREADPOOL_HEADROOM", "40"))
+
+@app.on_event("startup")
+async def size_threadpool():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = admission.max_concurrency + admission.max_queue + THREADPOOL_HEADROOM
+
+# Agent requests are tracked from the middleware, so the recorded duration
+# covers routing and response serialization as well as the endpoint body
+@app.middleware("http")
+async def track_agent_requests(request: Request, call_next):
+    if request.url.path not in ENDPOINT_PRIORITY:
+        return await call_next(request)
+    # The event loop thread serves every request, only the endpoint's threads are sampled
+    with profiler.request(request.url.path, sample_thread=False):
+        return await call_next(request)
+
+@contextmanager
+def agent_slot(request: Request, endpoint: str):
+    # Sync endpoints run on a threadpool thread, count it as working on the tracked request
+    with profiler.attach():
+        try:
+            with profiler.stage("admission_wait"):
+                admission.acquire(client_identifier(request), ENDPOINT_PRIORITY[endpoint])
+        except RateLimited as e:
+            raise HTTPException(status_code=429, detail=str(e),
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+        except AdmissionRejected as e:
+            raise HTTPException(status_code=503, detail=str(e),
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+        try:
+            yield
+        finally:
+            admission.release()
+
+# Admin endpoints are disabled unless THINKY_ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv("THINKY_ADMIN_TOKEN")
+
+def require_admin(x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")):
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
 
 # Request models
 class MoodRequest(BaseModel):
     mood_text: str
+    profile_id: Optional[str] = None
 
 class ScheduleRequest(BaseModel):
     mood_text: str
     daily_goals: Optional[List[str]] = None
     calendar_events: Optional[List[Dict]] = None
     preferences: Optional[Dict] = None
+    profile_id: Optional[str] = None
+    enrich: bool = False
+    speculative: Optional[bool] = None
+
+class MultiDayScheduleRequest(BaseModel):
+    mood_text: str
+    num_days: int = 7
+    start_date: Optional[str] = None
+    daily_goals: Optional[List[str]] = None
+    recurring_events: Optional[List[Dict]] = None
+    day_events: Optional[Dict[str, List[Dict]]] = None
+    preferences: Optional[Dict] = None
+    profile_id: Optional[str] = None
+    enrich: bool = False
 
 class ScheduleAdjustRequest(BaseModel):
     current_schedule: Dict
-    mood_text: str
+    mood_text: Optional[str] = None
     completed_activities: Optional[List[str]] = None
     new_events: Optional[List[Dict]] = None
+    previous_mood_analysis: Optional[Dict] = None
+    calendar_events: Optional[List[Dict]] = None
+    current_time: Optional[str] = None
     
 class CustomScheduleRequest(BaseModel):
     tasks: List[Dict]
@@ -49,6 +222,7 @@ class CustomScheduleRequest(BaseModel):
     fixed_events: Optional[List[Dict]] = None
     user_preferences: Optional[Dict] = None
     mood_text: Optional[str] = None
+    speculative: Optional[bool] = None
     
 class NutritionPlanRequest(BaseModel):
     mood_data: Dict
@@ -56,6 +230,37 @@ class NutritionPlanRequest(BaseModel):
     dietary_preferences: Optional[List[str]] = None
     allergies: Optional[List[str]] = None
     goals: Optional[str] = None
+    profile_id: Optional[str] = None
+    enrich: bool = False
+
+class ProfileWindowRequest(BaseModel):
+    duration_seconds: float = 30
+    interval_ms: Optional[float] = None
+
+class SlowCaptureRequest(BaseModel):
+    enabled: bool = True
+    threshold_ms: float = 10000
+    interval_ms: Optional[float] = None
+
+class PlanDayRequest(BaseModel):
+    mood_text: str
+    daily_goals: Optional[List[str]] = None
+    calendar_events: Optional[List[Dict]] = None
+    preferences: Optional[Dict] = None
+    medical_conditions: Optional[List[str]] = None
+    dietary_preferences: Optional[List[str]] = None
+    allergies: Optional[List[str]] = None
+    nutrition_goals: Optional[str] = None
+    profile_id: Optional[str] = None
+    enrich: bool = False
+
+class ProfileRequest(BaseModel):
+    preferences: Optional[Dict] = None
+    daily_goals: Optional[List[str]] = None
+    medical_conditions: Optional[List[str]] = None
+    dietary_preferences: Optional[List[str]] = None
+    allergies: Optional[List[str]] = None
+    nutrition_goals: Optional[str] = None
 
 # Routes
 
@@ -63,65 +268,207 @@ class NutritionPlanRequest(BaseModel):
 async def health_check():
     return "{Status: Live}"
 
+@app.get("/admission-stats")
+async def admission_stats():
+    return admission.stats()
+
+@app.get("/semantic-cache-stats")
+async def semantic_cache_stats():
+    return mood_analyzer.semantic_cache.stats()
+
+@app.get("/speculation-stats")
+async def speculation_stats():
+    return speculative_executor.stats()
+
+@app.get("/search-stats")
+async def search_stats():
+    return nutritionist.search_enricher.stats()
+
+@app.get("/profile-stats")
+async def profile_stats():
+    return profile_store.stats()
+
+def save_profile(profile_id: str, req: ProfileRequest, create: bool) -> Dict:
+    try:
+        profile = profile_store.put(profile_id, req.dict(), create=create)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    return profile.to_dict()
+
+# Profile ids are random and only issued by the server, so an id is needed to
+# read or change a profile and callers cannot claim ids of their own
+@app.post("/profiles")
+def create_profile(req: ProfileRequest):
+    return save_profile(uuid.uuid4().hex, req, create=True)
+
+@app.put("/profiles/{profile_id}")
+def replace_profile(profile_id: str, req: ProfileRequest):
+    return save_profile(profile_id, req, create=False)
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    return load_profile(profile_id).to_dict()
+
+@app.delete("/profiles/{profile_id}")
+def delete_profile(profile_id: str):
+    if not profile_store.delete(profile_id):
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+    mood_history.delete(profile_id)
+    return {"deleted": profile_id}
+
 @app.post("/analyze-mood")
-def analyze_mood(req: MoodRequest):
-    result = mood_analyzer.analyze_mood(topic=req.mood_text)
+def analyze_mood(req: MoodRequest, request: Request):
+    profile = load_profile(req.profile_id)
+    with agent_slot(request, "/analyze-mood"):
+        result = mood_analyzer.analyze_mood(topic=req.mood_text)
+    
+    record_mood(profile, result)
     return result
 
+@app.get("/mood-trends/{profile_id}")
+def mood_trends(profile_id: str):
+    return mood_history.trends(load_profile(profile_id).profile_id)
+
 @app.post("/create-schedule")
-def create_schedule(req: ScheduleRequest):
-    # First analyze the mood
-    mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
-    
-    # Then use the mood data to create a schedule
-    schedule_result = life_scheduler.create_schedule(
-        mood_data=mood_result,
-        daily_goals=req.daily_goals,
-        calendar_events=req.calendar_events,
-        preferences=req.preferences
-    )
-    
-    return {
-        "mood_analysis": mood_result,
-        "schedule": schedule_result
-    }
+def create_schedule(req: ScheduleRequest, request: Request, response: Response,
+                    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    profile = load_profile(req.profile_id)
+
+    def handler():
+        with agent_slot(request, "/create-schedule"):
+            def generate(mood_data):
+                return life_scheduler.create_schedule(
+                    mood_data=mood_data,
+                    daily_goals=from_profile(req.daily_goals, profile, "daily_goals"),
+                    calendar_events=req.calendar_events,
+                    preferences=from_profile(req.preferences, profile, "preferences"),
+                    enrich=req.enrich
+                )
+            
+            speculation = None
+            if use_speculation(req.speculative):
+                # Analyze the mood and create the schedule concurrently
+                mood_result, schedule_result, speculation = speculative_executor.run(
+                    req.mood_text, mood_analyzer, generate
+                )
+            else:
+                # First analyze the mood, then use the mood data to create a schedule
+                mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
+                schedule_result = generate(mood_result)
+            
+            record_mood(profile, mood_result)
+        
+        result = {
+            "mood_analysis": mood_result,
+            "schedule": schedule_result
+        }
+        if speculation:
+            result["speculation"] = speculation
+        return result
+
+    return run_idempotent("/create-schedule", idempotency_key, req, request, response, handler)
     
 
+@app.post("/create-multi-day-schedule")
+def create_multi_day_schedule(req: MultiDayScheduleRequest, request: Request, response: Response,
+                              idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    if not 1 <= req.num_days <= 14:
+        raise HTTPException(status_code=422, detail="num_days must be between 1 and 14")
+    if req.start_date:
+        try:
+            datetime.strptime(req.start_date, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=422, detail="start_date must be a date in YYYY-MM-DD format")
+    profile = load_profile(req.profile_id)
+
+    def handler():
+        with agent_slot(request, "/create-multi-day-schedule"):
+            # Analyze the mood once and share it across all days
+            mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
+            
+            multi_day_result = life_scheduler.create_multi_day_schedule(
+                mood_data=mood_result,
+                num_days=req.num_days,
+                start_date=req.start_date,
+                daily_goals=from_profile(req.daily_goals, profile, "daily_goals"),
+                recurring_events=req.recurring_events,
+                day_events=req.day_events,
+                preferences=from_profile(req.preferences, profile, "preferences"),
+                max_workers=int(os.getenv("THINKY_MULTI_DAY_WORKERS", "4")),
+                enrich=req.enrich
+            )
+        
+        return {
+            "mood_analysis": mood_result,
+            "schedule": multi_day_result
+        }
+
+    return run_idempotent("/create-multi-day-schedule", idempotency_key, req, request, response, handler)
+
 @app.post("/adjust-schedule")
-def adjust_schedule(req: ScheduleAdjustRequest):
-    # First analyze the current mood
-    new_mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
-    
-    # Then adjust the schedule based on the new mood
-    adjusted_schedule = life_scheduler.adjust_schedule(
-        current_schedule=req.current_schedule,
-        new_mood_data=new_mood_result,
-        completed_activities=req.completed_activities,
-        new_events=req.new_events
-    )
-    
-    return {
-        "updated_mood_analysis": new_mood_result,
-        "adjusted_schedule": adjusted_schedule
-    }
+def adjust_schedule(req: ScheduleAdjustRequest, request: Request, response: Response,
+                    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    if not req.mood_text and req.previous_mood_analysis is None:
+        raise HTTPException(status_code=422, detail="Either mood_text or previous_mood_analysis is required")
+
+    def handler():
+        with agent_slot(request, "/adjust-schedule"):
+            # First analyze the current mood, reusing the previous analysis if no new text was sent
+            if req.mood_text:
+                new_mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
+            else:
+                new_mood_result = req.previous_mood_analysis
+            
+            # Then adjust the schedule based on the new mood
+            adjusted_schedule = life_scheduler.adjust_schedule(
+                current_schedule=req.current_schedule,
+                new_mood_data=new_mood_result,
+                completed_activities=req.completed_activities,
+                new_events=req.new_events,
+                previous_mood_data=req.previous_mood_analysis,
+                calendar_events=req.calendar_events,
+                current_time=req.current_time
+            )
+        
+        return {
+            "updated_mood_analysis": new_mood_result,
+            "adjusted_schedule": adjusted_schedule
+        }
+
+    return run_idempotent("/adjust-schedule", idempotency_key, req, request, response, handler)
 
 @app.post("/create-custom-schedule")
-def create_custom_schedule(req: CustomScheduleRequest):
-    # Analyze mood if text is provided
-    mood_result = None
-    if req.mood_text:
-        mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
-    
-    # Create a custom schedule
-    custom_schedule = life_scheduler.create_custom_schedule(
-        tasks=req.tasks,
-        time_range=req.time_range,
-        fixed_events=req.fixed_events,
-        user_preferences=req.user_preferences,
-        mood_data=mood_result
-    )
+def create_custom_schedule(req: CustomScheduleRequest, request: Request):
+    with agent_slot(request, "/create-custom-schedule"):
+        def generate(mood_data):
+            return life_scheduler.create_custom_schedule(
+                tasks=req.tasks,
+                time_range=req.time_range,
+                fixed_events=req.fixed_events,
+                user_preferences=req.user_preferences,
+                mood_data=mood_data
+            )
+        
+        speculation = None
+        mood_result = None
+        if req.mood_text and use_speculation(req.speculative):
+            # Analyze the mood and create the custom schedule concurrently
+            mood_result, custom_schedule, speculation = speculative_executor.run(
+                req.mood_text, mood_analyzer, generate
+            )
+        else:
+            # Analyze mood if text is provided
+            if req.mood_text:
+                mood_result = mood_analyzer.analyze_mood(topic=req.mood_text)
+            
+            # Create a custom schedule
+            custom_schedule = generate(mood_result)
     
     response = {"custom_schedule": custom_schedule}
+    if speculation:
+        response["speculation"] = speculation
     
     # Include mood analysis if it was requested
     if mood_result:
@@ -130,18 +477,84 @@ def create_custom_schedule(req: CustomScheduleRequest):
     return response
 
 @app.post("/nutrition-plan")
-def generate_nutrition_plan(req: NutritionPlanRequest):
-    # Call your agent logic here, for example:
-    result = nutritionist.nutritional(
-        mood_data=req.mood_data,
-        medical_conditions=req.medical_conditions,
-        dietary_preferences=req.dietary_preferences,
-        allergies=req.allergies,
-        goals=req.goals
-    )
-    return result
+def generate_nutrition_plan(req: NutritionPlanRequest, request: Request, response: Response,
+                            idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    profile = load_profile(req.profile_id)
+
+    def handler():
+        with agent_slot(request, "/nutrition-plan"):
+            # Call your agent logic here, for example:
+            return nutritionist.nutritional(
+                mood_data=req.mood_data,
+                medical_conditions=from_profile(req.medical_conditions, profile, "medical_conditions"),
+                dietary_preferences=from_profile(req.dietary_preferences, profile, "dietary_preferences"),
+                allergies=from_profile(req.allergies, profile, "allergies"),
+                goals=from_profile(req.goals, profile, "nutrition_goals"),
+                enrich=req.enrich
+            )
+
+    return run_idempotent("/nutrition-plan", idempotency_key, req, request, response, handler)
+
+
+@app.post("/plan-day")
+def plan_day(req: PlanDayRequest, request: Request, response: Response,
+             idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    profile = load_profile(req.profile_id)
+
+    def handler():
+        with agent_slot(request, "/plan-day"):
+            # One mood analysis shared by the scheduler and the nutritionist, which run concurrently
+            result = day_planner.plan_day(
+                mood_text=req.mood_text,
+                daily_goals=from_profile(req.daily_goals, profile, "daily_goals"),
+                calendar_events=req.calendar_events,
+                preferences=from_profile(req.preferences, profile, "preferences"),
+                medical_conditions=from_profile(req.medical_conditions, profile, "medical_conditions"),
+                dietary_preferences=from_profile(req.dietary_preferences, profile, "dietary_preferences"),
+                allergies=from_profile(req.allergies, profile, "allergies"),
+                nutrition_goals=from_profile(req.nutrition_goals, profile, "nutrition_goals"),
+                enrich=req.enrich
+            )
+        
+        record_mood(profile, result["mood_analysis"])
+        return result
+
+    return run_idempotent("/plan-day", idempotency_key, req, request, response, handler)
+
+# Admin: on-demand sampling profiler
+
+@app.get("/admin/profiler", dependencies=[Depends(require_admin)])
+def profiler_status():
+    return profiler.status()
+
+@app.post("/admin/profiler/window", dependencies=[Depends(require_admin)])
+def profiler_window(req: ProfileWindowRequest):
+    if not 0 < req.duration_seconds <= 600:
+        raise HTTPException(status_code=422, detail="duration_seconds must be between 0 and 600")
+    profiler.start_window(req.duration_seconds, req.interval_ms)
+    return profiler.status()
+
+@app.post("/admin/profiler/slow-requests", dependencies=[Depends(require_admin)])
+def profiler_slow_requests(req: SlowCaptureRequest):
+    if req.enabled:
+        profiler.enable_slow_capture(req.threshold_ms, req.interval_ms)
+    else:
+        profiler.disable_slow_capture()
+    return profiler.status()
+
+@app.get("/admin/profiler/captures", dependencies=[Depends(require_admin)])
+def profiler_captures():
+    return profiler.list_captures()
 
+@app.get("/admin/profiler/captures/{capture_id}", dependencies=[Depends(require_admin)])
+def profiler_capture(capture_id: str, format: str = "collapsed"):
+    path = profiler.capture_path(capture_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Capture not found")
+    return FileResponse(path, media_type="text/plain" if format == "collapsed" else "application/json",
+                        filename=os.path.basename(path))
 
 if __name__ == "__main__":
+    # Development server; for production run `gunicorn -c gunicorn.conf.py main:app`
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8002, reload=True)
\ No newline at end of file
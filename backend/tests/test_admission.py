@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from Thinky_agent.admission import AdmissionController, AdmissionRejected, RateLimited
+from Thinky_agent.shared_state import SharedStateStore
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def queue_waiters(controller, priorities):
+    """Start one blocked acquire per priority, in order, and return the order they are granted in."""
+    granted = []
+    lock = threading.Lock()
+
+    def acquire(priority):
+        controller.acquire("client", priority)
+        with lock:
+            granted.append(priority)
+
+    threads = []
+    for i, priority in enumerate(priorities):
+        thread = threading.Thread(target=acquire, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: sum(controller.stats()["queued"].values()) == i + 1)
+    return granted, threads
+
+
+def test_admits_immediately_below_capacity():
+    controller = AdmissionController(max_concurrency=2)
+
+    with controller.admit("client", "interactive") as waited:
+        assert waited == 0.0
+        assert controller.stats()["active"] == 1
+    assert controller.stats()["active"] == 0
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        AdmissionController().acquire("client", "urgent")
+
+
+def test_free_slots_follow_class_weights():
+    controller = AdmissionController(max_concurrency=1, weights={"interactive": 3, "bulk": 1}, burst=100)
+    controller.acquire("client", "bulk")
+    granted, threads = queue_waiters(controller, ["bulk"] * 4 + ["interactive"] * 4)
+
+    for i in range(len(threads)):
+        controller.release()
+        wait_until(lambda: len(granted) == i + 1)
+    controller.release()
+    for thread in threads:
+        thread.join()
+
+    # Interactive gets three slots for every bulk one, but bulk is not starved
+    assert granted[:4] == ["interactive", "interactive", "bulk", "interactive"]
+    assert granted.count("bulk") == 4
+
+
+def test_queue_timeout_rejects_and_dequeues():
+    controller = AdmissionController(max_concurrency=1, queue_timeout=0.05)
+    controller.acquire("client", "interactive")
+
+    with pytest.raises(AdmissionRejected):
+        controller.acquire("client", "standard")
+    stats = controller.stats()
+    assert sum(stats["queued"].values()) == 0
+    assert stats["classes"]["standard"]["rejected"] == 1
+
+    # The slot freed by the first request goes to the next caller, not the timed out one
+    controller.release()
+    assert controller.acquire("client", "standard") == 0.0
+
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+    controller.acquire("client", "interactive")
+    _, threads = queue_waiters(controller, ["standard"])
+
+    with pytest.raises(AdmissionRejected):
+        controller.acquire("client", "standard")
+    controller.release()
+    controller.release()
+    threads[0].join()
+
+
+def test_rate_limit_per_client():
+    controller = AdmissionController(rate_per_second=0.001, burst=2)
+
+    for _ in range(2):
+        controller.acquire("alice", "interactive")
+    with pytest.raises(RateLimited) as excinfo:
+        controller.acquire("alice", "interactive")
+    assert excinfo.value.retry_after > 0
+    assert controller.stats()["classes"]["interactive"]["rate_limited"] == 1
+    controller.acquire("bob", "interactive")
+
+
+def test_rate_limit_refills_over_time():
+    controller = AdmissionController(rate_per_second=20, burst=1)
+
+    controller.acquire("alice", "interactive")
+    with pytest.raises(RateLimited):
+        controller.acquire("alice", "interactive")
+    time.sleep(0.1)
+    controller.acquire("alice", "interactive")
+
+
+def test_shared_rate_limit_holds_across_controllers(tmp_path):
+    shared = SharedStateStore(str(tmp_path / "shared_state.db"))
+    first = AdmissionController(rate_per_second=0.001, burst=1, shared=shared)
+    second = AdmissionController(rate_per_second=0.001, burst=1, shared=shared)
+
+    first.acquire("alice", "interactive")
+    with pytest.raises(RateLimited):
+        second.acquire("alice", "interactive")
@@ -0,0 +1,188 @@
+import threading
+import time
+
+import pytest
+
+from Thinky_agent.idempotency import (
+    IdempotencyConflict,
+    IdempotencyInProgress,
+    IdempotencyStore,
+    request_fingerprint,
+)
+from Thinky_agent.shared_state import SharedStateStore
+
+
+class Counter:
+    """Handler that counts its calls and returns a fresh result each time."""
+
+    def __init__(self, result=None, delay=0.0):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.result if self.result is not None else {"call": self.calls}
+
+
+FINGERPRINT = request_fingerprint({"mood_text": "tired"})
+
+
+def test_replays_stored_result():
+    store = IdempotencyStore()
+    handler = Counter()
+
+    assert store.run("k", "/plan-day", FINGERPRINT, handler) == ({"call": 1}, False)
+    assert store.run("k", "/plan-day", FINGERPRINT, handler) == ({"call": 1}, True)
+    assert handler.calls == 1
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_missing_key_bypasses_store():
+    store = IdempotencyStore()
+    handler = Counter()
+
+    store.run(None, "/plan-day", FINGERPRINT, handler)
+    store.run(None, "/plan-day", FINGERPRINT, handler)
+    assert handler.calls == 2
+
+
+def test_reused_key_with_other_body_conflicts():
+    store = IdempotencyStore()
+    store.run("k", "/plan-day", FINGERPRINT, Counter())
+
+    with pytest.raises(IdempotencyConflict):
+        store.run("k", "/plan-day", request_fingerprint({"mood_text": "happy"}), Counter())
+
+
+def test_keys_are_scoped_by_client_and_endpoint():
+    store = IdempotencyStore()
+    handler = Counter()
+
+    store.run("k", "/plan-day", FINGERPRINT, handler, client_id="alice")
+    _, replayed = store.run("k", "/plan-day", FINGERPRINT, handler, client_id="bob")
+    assert not replayed
+    _, replayed = store.run("k", "/create-schedule", FINGERPRINT, handler, client_id="alice")
+    assert not replayed
+    assert handler.calls == 3
+
+
+def test_concurrent_duplicate_waits_for_original():
+    store = IdempotencyStore()
+    handler = Counter(delay=0.2)
+    results = []
+
+    def duplicate():
+        results.append(store.run("k", "/plan-day", FINGERPRINT, handler))
+
+    threads = [threading.Thread(target=duplicate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert handler.calls == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True, True]
+    assert all(result == {"call": 1} for result, _ in results)
+
+
+def test_duplicate_gives_up_after_wait_timeout():
+    store = IdempotencyStore(wait_timeout=0.05)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+        return {"ok": True}
+
+    original = threading.Thread(target=store.run, args=("k", "/plan-day", FINGERPRINT, slow))
+    original.start()
+    started.wait()
+    try:
+        with pytest.raises(IdempotencyInProgress):
+            store.run("k", "/plan-day", FINGERPRINT, Counter())
+    finally:
+        release.set()
+        original.join()
+
+
+def test_error_results_are_not_stored():
+    store = IdempotencyStore()
+    failing = Counter(result={"mood_analysis": {"error": "unparseable", "raw_response": "..."}})
+
+    store.run("k", "/plan-day", FINGERPRINT, failing)
+    result, replayed = store.run("k", "/plan-day", FINGERPRINT, Counter())
+    assert (result, replayed) == ({"call": 1}, False)
+
+
+def test_exceptions_are_not_stored():
+    store = IdempotencyStore()
+
+    def broken():
+        raise RuntimeError("model unavailable")
+
+    with pytest.raises(RuntimeError):
+        store.run("k", "/plan-day", FINGERPRINT, broken)
+    assert store.run("k", "/plan-day", FINGERPRINT, Counter()) == ({"call": 1}, False)
+
+
+def test_waiting_duplicate_retries_after_original_fails():
+    store = IdempotencyStore()
+    started = threading.Event()
+    release = threading.Event()
+
+    def broken():
+        started.set()
+        release.wait()
+        raise RuntimeError("model unavailable")
+
+    def original():
+        with pytest.raises(RuntimeError):
+            store.run("k", "/plan-day", FINGERPRINT, broken)
+
+    thread = threading.Thread(target=original)
+    thread.start()
+    started.wait()
+    results = []
+    duplicate = threading.Thread(target=lambda: results.append(store.run("k", "/plan-day", FINGERPRINT, Counter())))
+    duplicate.start()
+    release.set()
+    thread.join()
+    duplicate.join()
+
+    assert results == [({"call": 1}, False)]
+
+
+def test_entries_expire_after_ttl():
+    store = IdempotencyStore(ttl_seconds=0.05)
+    handler = Counter()
+
+    store.run("k", "/plan-day", FINGERPRINT, handler)
+    time.sleep(0.1)
+    assert store.run("k", "/plan-day", FINGERPRINT, handler) == ({"call": 2}, False)
+
+
+def test_oldest_entries_are_evicted_beyond_max_entries():
+    store = IdempotencyStore(max_entries=2)
+    handler = Counter()
+
+    for key in ("a", "b", "c"):
+        store.run(key, "/plan-day", FINGERPRINT, handler)
+
+    assert len(store._entries) == 2
+    assert store.run("a", "/plan-day", FINGERPRINT, handler) == ({"call": 4}, False)
+    assert store.run("c", "/plan-day", FINGERPRINT, handler) == ({"call": 3}, True)
+
+
+def test_shared_store_replays_across_instances(tmp_path):
+    shared = SharedStateStore(str(tmp_path / "shared_state.db"))
+    handler = Counter()
+
+    first = IdempotencyStore(shared=shared)
+    second = IdempotencyStore(shared=shared)
+    assert first.run("k", "/plan-day", FINGERPRINT, handler) == ({"call": 1}, False)
+    assert second.run("k", "/plan-day", FINGERPRINT, handler) == ({"call": 1}, True)
+    second.run("other", "/plan-day", FINGERPRINT, Counter(result={"error": "unparseable"}))
+    assert first.run("other", "/plan-day", FINGERPRINT, handler) == ({"call": 2}, False)
@@ -0,0 +1,40 @@
+from Thinky_agent.mood_lexicon import detect_moods
+from Thinky_agent.semantic_cache import embed_text
+from Thinky_agent.speculation import estimate_mood
+
+
+def similarity(a, b):
+    return float(embed_text(a) @ embed_text(b))
+
+
+def test_cues_match_whole_words():
+    assert detect_moods("I made dinner and I am exhausted") == {"tired"}
+    assert "happy" not in detect_moods("I did not enjoy today")
+
+
+def test_negated_cues_do_not_count():
+    assert detect_moods("I am not tired at all") == set()
+    assert detect_moods("not tired, but a bit sad") == {"sad"}
+    assert detect_moods("no energy today") == {"tired"}
+
+
+def test_estimate_energy():
+    assert estimate_mood("I made dinner and I am exhausted")["Energy"] == "Low"
+    assert estimate_mood("I am not tired at all")["Energy"] == "Medium"
+    assert estimate_mood("got promoted, want to celebrate")["Energy"] == "High"
+
+
+def test_embedding_separates_negation():
+    assert similarity("I am very tired", "I am not tired") < 0.8
+    assert similarity("I am happy", "I am not happy") < 0.8
+
+
+def test_embedding_separates_moods_in_shared_context():
+    context = "had a long day at work, kids were loud, want pizza, feeling "
+
+    assert similarity(context + "sad", context + "happy") < 0.8
+    assert similarity(context + "sad", context + "down") > 0.8
+
+
+def test_embedding_matches_paraphrases():
+    assert similarity("I feel so tired and craving pizza", "I'm really tired and I crave pizza") > 0.8
@@ -0,0 +1,240 @@
+import copy
+
+from Thinky_agent.schedule_validator import (
+    minutes_to_time,
+    repair_schedule,
+    reschedule_locally,
+    time_to_minutes,
+    validate_schedule,
+)
+
+FIXED_EVENTS = [
+    {"title": "Office", "start_time": "09:00", "end_time": "18:00", "is_flexible": False},
+    {"title": "Meetings", "start_time": "09:00", "end_time": "09:40", "is_flexible": False},
+    {"title": "Exercise", "start_time": "19:30", "end_time": "20:30", "is_flexible": True},
+    {"title": "Prayer", "start_time": "21:45", "end_time": "22:15", "is_flexible": False},
+]
+
+PREFERENCES = {
+    "preferred_break_duration": 15,
+    "preferred_meal_times": {"breakfast": "08:00", "lunch": "13:30", "dinner": "20:45"},
+}
+
+
+def entry(time, activity, duration, **extra):
+    return dict({"time": time, "activity": activity, "duration_minutes": duration}, **extra)
+
+
+def split_office_day():
+    """A correct schedule whose office day is split into several work blocks."""
+    return [
+        entry("07:00", "Wake up and stretch", 30),
+        entry("07:30", "Morning prayer and meditation", 30),
+        entry("08:00", "Breakfast", 30),
+        entry("08:30", "Prepare for meetings", 30),
+        entry("09:00", "Team Meetings", 40),
+        entry("09:40", "Office: project work", 140),
+        entry("12:00", "Office: emails", 90),
+        entry("13:30", "Lunch", 60),
+        entry("14:30", "Office: project work", 210),
+        entry("18:00", "Call family", 30),
+        entry("18:30", "Free time", 60),
+        entry("19:30", "Exercise", 60),
+        entry("20:30", "Break", 15, activity_type="break"),
+        entry("20:45", "Dinner", 45),
+        entry("21:30", "Break", 15, activity_type="break"),
+        entry("21:45", "Prayer", 30),
+        entry("22:15", "Wind down", 45),
+    ]
+
+
+def slots(schedule):
+    return [(item["time"], item["activity"], item["duration_minutes"]) for item in schedule]
+
+
+def test_time_conversion_round_trip():
+    assert time_to_minutes("09:05") == 545
+    assert time_to_minutes("9am") is None
+    assert minutes_to_time(545) == "09:05"
+
+
+def test_split_office_day_is_valid():
+    assert validate_schedule(split_office_day(), FIXED_EVENTS, PREFERENCES) == []
+
+
+def test_repair_leaves_correct_schedule_untouched():
+    schedule = split_office_day()
+    repaired, report = repair_schedule(copy.deepcopy(schedule), FIXED_EVENTS, PREFERENCES)
+
+    assert report["valid"]
+    assert report["repairs"] == []
+    assert slots(repaired) == slots(schedule)
+
+
+def test_exact_match_wins_over_earlier_title_match():
+    schedule = split_office_day()
+    # "Prayer" is missing at its time, the morning prayer must not be taken for it
+    schedule = [item for item in schedule if item["activity"] != "Prayer"]
+
+    repaired, report = repair_schedule(schedule, FIXED_EVENTS, PREFERENCES)
+    by_activity = {item["activity"]: item for item in repaired}
+
+    assert by_activity["Morning prayer and meditation"]["time"] == "07:30"
+    assert by_activity["Prepare for meetings"]["time"] == "08:30"
+    assert by_activity["Team Meetings"]["time"] == "09:00"
+    assert by_activity["Prayer"]["time"] == "21:45"
+    assert "Inserted missing fixed event 'Prayer'" in report["repairs"]
+
+
+def test_nearby_entry_is_moved_back_to_fixed_time():
+    schedule = split_office_day()
+    schedule[15] = entry("21:55", "Prayer", 30)
+    schedule[16] = entry("22:25", "Wind down", 35)
+
+    repaired, report = repair_schedule(schedule, FIXED_EVENTS, PREFERENCES)
+    prayer = next(item for item in repaired if item["activity"] == "Prayer")
+
+    assert not report["valid"]
+    assert (prayer["time"], prayer["duration_minutes"]) == ("21:45", 30)
+    assert validate_schedule(repaired, FIXED_EVENTS, PREFERENCES) == []
+
+
+def test_long_block_is_not_stretched_over_the_day():
+    repaired, _ = repair_schedule(split_office_day(), FIXED_EVENTS, PREFERENCES)
+
+    assert all(item["duration_minutes"] <= 210 for item in repaired)
+
+
+def test_overlapping_flexible_entries_are_shifted():
+    schedule = [
+        entry("10:00", "Read", 60),
+        entry("10:30", "Walk", 30),
+    ]
+
+    repaired, report = repair_schedule(schedule, [], {})
+
+    assert slots(repaired) == [("10:00", "Read", 60), ("11:00", "Walk", 30)]
+    assert any(issue.startswith("'Read' overlaps 'Walk'") for issue in report["issues"])
+
+
+def test_entry_pushed_past_a_fixed_event():
+    events = [{"title": "Dentist", "start_time": "10:00", "end_time": "11:00", "is_flexible": False}]
+    schedule = [entry("09:30", "Emails", 60), entry("10:00", "Dentist", 60)]
+
+    repaired, _ = repair_schedule(schedule, events, {})
+
+    assert slots(repaired) == [("10:00", "Dentist", 60), ("11:00", "Emails", 60)]
+
+
+def office_day_in_progress():
+    return [
+        entry("09:00", "Meetings", 40, is_flexible=False),
+        entry("09:40", "Office tasks", 140),
+        entry("12:00", "Break", 15, activity_type="break"),
+        entry("12:15", "Office tasks", 75),
+        entry("13:30", "Lunch break", 60, activity_type="meal"),
+        entry("14:30", "Office tasks", 210),
+        entry("18:00", "Break", 30, activity_type="break"),
+        entry("18:30", "Exercise", 60),
+        entry("19:30", "Dinner", 45),
+        entry("20:15", "Reading", 60),
+        entry("21:15", "Break", 30, activity_type="break"),
+        entry("21:45", "Prayer", 30),
+        entry("22:15", "Wind down", 45),
+    ]
+
+
+CLIENT_CALL = [{"title": "Client call", "start_time": "18:45", "end_time": "19:30", "is_flexible": False}]
+
+
+def test_reschedule_removes_only_exactly_named_past_activities():
+    rescheduled, changes = reschedule_locally(
+        office_day_in_progress(), CLIENT_CALL, ["Office", "Meetings", "Lunch break"],
+        fixed_events=FIXED_EVENTS, current_time="18:40",
+    )
+    activities = [item["activity"] for item in rescheduled]
+
+    assert activities.count("Office tasks") == 3
+    assert "Meetings" not in activities
+    assert "Lunch break" not in activities
+    assert "Removed completed 'Meetings' at 09:00" in changes
+    assert "Removed completed 'Lunch break' at 13:30" in changes
+    assert activities.count("Break") >= 2
+
+
+def test_reschedule_keeps_future_completed_entries():
+    rescheduled, _ = reschedule_locally(
+        office_day_in_progress(), CLIENT_CALL, ["Reading"], current_time="18:40",
+    )
+
+    assert "Reading" in [item["activity"] for item in rescheduled]
+
+
+def test_reschedule_never_moves_fixed_entries():
+    rescheduled, changes = reschedule_locally(
+        office_day_in_progress(), CLIENT_CALL, [], fixed_events=FIXED_EVENTS, current_time="18:40",
+    )
+    by_activity = {item["activity"]: item for item in rescheduled}
+
+    assert by_activity["Prayer"]["time"] == "21:45"
+    assert by_activity["Client call"]["time"] == "18:45"
+    assert by_activity["Exercise"]["time"] == "19:30"
+    assert not any("Prayer" in change for change in changes)
+    ordered = [(time_to_minutes(item["time"]), item["duration_minutes"]) for item in rescheduled]
+    assert all(start + duration <= next_start
+               for (start, duration), (next_start, _) in zip(ordered, ordered[1:]))
+
+
+def test_reschedule_gives_up_when_a_new_event_hits_a_fixed_entry():
+    clash = [{"title": "Dentist", "start_time": "21:30", "end_time": "22:00", "is_flexible": False}]
+
+    rescheduled, changes = reschedule_locally(
+        office_day_in_progress(), clash, [], fixed_events=FIXED_EVENTS, current_time="18:40",
+    )
+
+    assert rescheduled is None
+    assert changes == ["'Dentist' conflicts with fixed entry 'Prayer'"]
+
+
+def test_repair_marks_pinned_entries_as_fixed():
+    repaired, _ = repair_schedule(split_office_day(), FIXED_EVENTS, PREFERENCES)
+    flags = {item["activity"]: item.get("is_flexible") for item in repaired}
+
+    assert flags["Team Meetings"] is False
+    assert flags["Prayer"] is False
+    assert flags["Dinner"] is None
+
+
+def test_bad_duration_is_not_stretched_to_the_next_entry():
+    schedule = [entry("10:30", "Lunch", -5), entry("23:30", "Read", 30)]
+
+    repaired, report = repair_schedule(schedule, [], {"preferred_break_duration": 15})
+
+    by_activity = {item["activity"]: item for item in repaired}
+
+    assert (by_activity["Lunch"]["time"], by_activity["Lunch"]["duration_minutes"]) == ("10:30", 15)
+    assert (by_activity["Read"]["time"], by_activity["Read"]["duration_minutes"]) == ("23:30", 30)
+    assert "Set duration of 'Lunch' to 15 minutes" in report["repairs"]
+
+
+def test_bad_duration_stops_at_the_next_entry():
+    schedule = [entry("10:30", "Coffee", None), entry("10:40", "Read", 30)]
+
+    repaired, _ = repair_schedule(schedule, [], {})
+
+    assert slots(repaired) == [("10:30", "Coffee", 10), ("10:40", "Read", 30)]
+
+
+def test_reschedule_splits_an_entry_already_running():
+    schedule = [entry("09:00", "Deep work", 120), entry("12:30", "Lunch", 60)]
+    meeting = [{"title": "Meeting", "start_time": "10:30", "end_time": "11:30", "is_flexible": False}]
+
+    rescheduled, changes = reschedule_locally(schedule, meeting, [], current_time="10:00")
+
+    assert slots(rescheduled) == [
+        ("09:00", "Deep work", 90),
+        ("10:30", "Meeting", 60),
+        ("11:30", "Deep work", 30),
+        ("12:30", "Lunch", 60),
+    ]
+    assert "Paused 'Deep work' at 10:30 for 'Meeting'" in changes